@@ -0,0 +1,177 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# Without this SDL swallows SIGTERM and the pool can never stop its workers
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+from settings import *
+from main import SystemGuardian
+
+# Runs many full headless games with a scripted player across a process pool
+# and aggregates the outcomes, for balancing weapons, waves and spawn odds.
+# Every run is fully determined by its seed.
+#
+#   python batch.py --runs 2000                    all cores, default output
+#   python batch.py --runs 200 --workers 4 --out r.json
+#   python batch.py --seed 500 --runs 1            replay a single run
+
+WALL_COST, HEAL_COST, REPAIR_COST = 45, 100, 200
+RING = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if abs(dx) + abs(dy) == 2]
+
+class Autopilot:
+    # Scripted player: holds a spot next to the core and shoots the closest
+    # enemy in range. Between waves it buys the best unlocked weapon, heals,
+    # repairs the core, rings the core with walls, then starts the next wave.
+    def __init__(self, g, rnd):
+        self.g = g
+        self.rnd = rnd
+        self.home = (g.core_gx + 1, g.core_gy)
+
+    def tick(self):
+        if self.g.state == "INTERMISSION":
+            self.prepare()
+            self.g.spawn_wave()
+        elif self.g.state == "PLAYING":
+            self.walk(self.home)
+            self.fight()
+
+    def prepare(self):
+        g = self.g
+        for name in ('SHOTGUN', 'RIFLE'):
+            if name in g.unlocked_weapons and name not in g.purchased_weapons and g.money >= WEAPON_STATS[name]['cost']:
+                g.buy_item("WEAPONS", name, WEAPON_STATS[name]['cost'], target_slot=0)
+        if g.player.hp < g.player.max_hp / 2 and g.money >= HEAL_COST: g.buy_item("UTILITY", "HP", HEAL_COST)
+        if g.core_hp < g.core_max_hp / 2 and g.money >= REPAIR_COST: g.buy_item("UTILITY", "CORE", REPAIR_COST)
+
+        # Walls go on the ring two tiles out from the core, within build range of the player
+        px, py = int(g.player.grid_pos.x), int(g.player.grid_pos.y)
+        free = [(g.core_gx + dx, g.core_gy + dy) for dx, dy in RING
+                if not g.is_tile_blocked(g.core_gx + dx, g.core_gy + dy)
+                and (g.core_gx + dx, g.core_gy + dy) != (px, py)
+                and abs(g.core_gx + dx - px) + abs(g.core_gy + dy - py) <= 3]
+        while free and g.money >= WALL_COST * 2 and len(g.player_walls) < g.max_walls_base + g.max_walls_extra:
+            if not g.buy_item("DEFENSE", "WALL", WALL_COST): break
+            g.selected_slot = next(i for i, s in enumerate(g.inventory) if s and s['type'] == 'WALL')
+            g.build_wall(*free.pop(self.rnd.randrange(len(free))))
+        g.selected_slot = 0
+
+    def walk(self, goal):
+        g, p = self.g, self.g.player
+        if p.is_moving or g.now - p.last_move_time <= p.move_delay: return
+        dx, dy = goal[0] - int(p.grid_pos.x), goal[1] - int(p.grid_pos.y)
+        if dx and p.move_to((dx > 0) - (dx < 0), 0, g) or dy and p.move_to(0, (dy > 0) - (dy < 0), g):
+            p.last_move_time = g.now
+
+    def fight(self):
+        g = self.g
+        store = g.enemy_store
+        if not store.count: return
+        item = g.inventory[g.selected_slot]
+        if not item or item['type'] != 'WEAPON': return
+        cx, cy = g.player.rect.center
+        d = (store.pos[:store.count] + TILE_SIZE // 2 - (cx, cy)) ** 2
+        i = int(d.sum(axis=1).argmin())
+        if d[i].sum() <= WEAPON_STATS[item['name']]['range'] ** 2:
+            g.shoot_weapon(target=store.sprites[i].rect.center)
+
+def play(seed, max_waves=30, max_ticks=100000):
+    g = SystemGuardian(headless=True, seed=seed)
+    pilot = Autopilot(g, random.Random(seed))
+    g.start_intermission()
+    money = []
+    wave = g.wave
+    # Why the run ended: game_over, max_waves (survived) or max_ticks (cut off)
+    while True:
+        if g.state == "GAMEOVER":
+            end = "game_over"
+            break
+        if g.clock.get_ticks() >= max_ticks * g.clock.step:
+            end = "max_ticks"
+            break
+        pilot.tick()
+        if g.wave != wave:
+            wave = g.wave
+            if wave > max_waves:
+                end = "max_waves"
+                break
+            money.append(g.money)
+        g.step()
+    return {
+        'seed': seed,
+        # g.wave is the wave in progress unless the game sits in intermission
+        'waves': g.wave if g.state == "INTERMISSION" else g.wave - 1,
+        'ticks': g.clock.get_ticks() // g.clock.step,
+        'damage': round(float(g.stats_damage_dealt), 1),
+        'walls': g.stats_walls_built,
+        'money': money,
+        'end': end,
+        'survived': end == "max_waves",
+    }
+
+def summarize(values):
+    values = sorted(values)
+    if not values: return {}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {'mean': round(statistics.fmean(values), 2), 'p10': pick(0.1), 'median': pick(0.5), 'p90': pick(0.9)}
+
+def aggregate(runs):
+    curves = {}
+    for r in runs:
+        for i, m in enumerate(r['money']): curves.setdefault(i + 1, []).append(m)
+    return {
+        'runs': len(runs),
+        'survived': sum(r['survived'] for r in runs),
+        'ended': {end: sum(r['end'] == end for r in runs) for end in ("game_over", "max_waves", "max_ticks")},
+        'waves': summarize([r['waves'] for r in runs]),
+        'damage': summarize([r['damage'] for r in runs]),
+        'walls': summarize([r['walls'] for r in runs]),
+        'money_at_wave_start': {w: round(statistics.fmean(v), 1) for w, v in sorted(curves.items())},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch of headless System Guardian games with a scripted player")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first run; run i uses seed + i")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-waves", type=int, default=30)
+    parser.add_argument("--max-ticks", type=int, default=100000, help="sim ticks before a stalled run is cut off")
+    parser.add_argument("--out", default="batch_results.json")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.runs)
+    t = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        runs = pool.starmap(play, [(s, args.max_waves, args.max_ticks) for s in seeds], chunksize=max(1, args.runs // (args.workers * 8)))
+    elapsed = time.perf_counter() - t
+
+    # Runs are stored as rows under a shared header to keep the file small
+    fields = ['seed', 'waves', 'ticks', 'damage', 'walls', 'end', 'survived', 'money']
+    results = {
+        'meta': {'runs': args.runs, 'seed': args.seed, 'workers': args.workers, 'max_waves': args.max_waves,
+                 'max_ticks': args.max_ticks,
+                 'seconds': round(elapsed, 2), 'python': platform.python_version(), 'time': time.strftime("%Y-%m-%d %H:%M:%S")},
+        'summary': aggregate(runs),
+        'fields': fields,
+        'runs': [[r[f] for f in fields] for r in runs],
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, separators=(",", ":"))
+
+    s = results['summary']
+    print(f"{args.runs} runs in {elapsed:.1f}s on {args.workers} workers ({args.runs / elapsed:.1f} games/s)")
+    print(f"waves   {s['waves']}")
+    print(f"damage  {s['damage']}")
+    print(f"walls   {s['walls']}")
+    print(f"ended   {s['ended']}")
+    print(f"survived {s['survived']}/{args.runs}, written to {args.out}")
+
+if __name__ == "__main__":
+    sys.exit(main())
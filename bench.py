@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from settings import *
+from main import SystemGuardian
+from sprites import Grenade
+from entities import Enemy, ShooterEnemy, PlayerWall, CryoNode, EnemySpawner, EnergyNode
+
+# Scenario-driven benchmark for the per-tick subsystems of SystemGuardian.
+# Every (scenario, subsystem) pair gets a freshly built headless world, so
+# results only depend on the seed and the code under test.
+#
+#   python bench.py                       run everything, print a table
+#   python bench.py --out new.json        also save the results
+#   python bench.py --compare old.json    print ratios against a saved run
+
+# update_heatmap alone times the full rebuild done after reset; the :near_core
+# and :far variants time the incremental repair after one structure edit
+SUBSYSTEMS = ['update_heatmap', 'update_heatmap:near_core', 'update_heatmap:far',
+              'update_bullets', 'update_enemies_logic', 'process_grenades', '_draw_game']
+
+def wave_stats(wave):
+    return {'speed': max(380, 1100 - (wave * 40)), 'hp': 50 + wave * 15, 'damage': 6 + wave}
+
+def free_tiles(g, rnd, count, near=None, max_dist=None):
+    tiles = []
+    for _ in range(count * 50):
+        if len(tiles) >= count: break
+        if near:
+            gx, gy = near[0] + rnd.randint(-max_dist, max_dist), near[1] + rnd.randint(-max_dist, max_dist)
+        else:
+            gx, gy = rnd.randint(0, g.map_size - 1), rnd.randint(0, g.map_size - 1)
+        if not (0 <= gx < g.map_size and 0 <= gy < g.map_size): continue
+        if g.is_tile_blocked(gx, gy) or (gx, gy) == (g.core_gx, g.core_gy) or (gx, gy) in tiles: continue
+        tiles.append((gx, gy))
+    return tiles
+
+def add_enemies(g, rnd, count, wave=20):
+    g.max_enemies_cap = max(g.max_enemies_cap, len(g.enemies) + count)
+    stats = wave_stats(wave)
+    for i, (gx, gy) in enumerate(free_tiles(g, rnd, count)):
+        cls = ShooterEnemy if i % 4 == 0 else Enemy
+        g.enemies.add(cls(gx, gy, stats))
+
+def fortify(g, rnd, walls=15, cryo=5):
+    core = (g.core_gx, g.core_gy)
+    for gx, gy in free_tiles(g, rnd, walls, near=core, max_dist=4):
+        g.player_walls.add(PlayerWall(gx, gy))
+    for gx, gy in free_tiles(g, rnd, cryo, near=core, max_dist=6):
+        g.cryo_nodes.add(CryoNode(gx, gy))
+
+def add_structures(g, rnd):
+    core = (g.core_gx, g.core_gy)
+    for gx, gy in free_tiles(g, rnd, 2, near=core, max_dist=20):
+        g.spawners.add(EnemySpawner(gx, gy))
+    for gx, gy in free_tiles(g, rnd, 1, near=core, max_dist=16):
+        g.nodes.add(EnergyNode(gx, gy))
+
+def edit_structure(w, where):
+    # Alternately places and removes a structure on one tile, either next to
+    # the core or out by a map corner, cycling between a wall and a cryo node
+    g = w.g
+    if w.edit is not None:
+        w.edit.kill()
+        w.edit = None
+        return
+    if where not in w.edit_tiles:
+        near = (g.core_gx, g.core_gy) if where == 'near_core' else (g.map_size // 8, g.map_size // 8)
+        w.edit_tiles[where] = (free_tiles(g, w.rnd, 1, near=near, max_dist=2) or free_tiles(g, w.rnd, 1, near=near, max_dist=6))[0]
+    gx, gy = w.edit_tiles[where]
+    if w.edits % 2 == 0:
+        w.edit = PlayerWall(gx, gy)
+        g.player_walls.add(w.edit)
+    else:
+        w.edit = CryoNode(gx, gy)
+        g.cryo_nodes.add(w.edit)
+    w.edits += 1
+
+def top_up_bullets(g, rnd, count):
+    cx, cy = g.player.rect.center
+    while len(g.bullets) < count:
+        w = WEAPON_STATS[rnd.choice(['PISTOL', 'RIFLE', 'SHOTGUN'])]
+        g.bullets.spawn(cx, cy, rnd.uniform(-3.14, 3.14), is_enemy=rnd.random() < 0.3,
+                        damage=w['damage'], speed=w['speed'], max_dist=w['range'], color=w['color'])
+
+class World:
+    def __init__(self, seed):
+        self.g = SystemGuardian(headless=True, seed=seed)
+        self.g.start_intermission()
+        self.rnd = random.Random(seed)
+        self.bullets = 50
+        self.edit = None
+        self.edits = 0
+        self.edit_tiles = {}
+
+def build(scenario, seed):
+    w = World(seed)
+    scenario['setup'](w)
+    w.g.state = "PLAYING"
+    w.g.update_heatmap()
+    return w
+
+def setup_wave(wave):
+    def setup(w):
+        w.g.wave = wave - 1
+        w.g.spawn_wave()
+    return setup
+
+def setup_survival_cap(w):
+    setup_wave(5)(w)
+    add_enemies(w.g, w.rnd, w.g.max_enemies_cap - len(w.g.enemies), wave=5)
+
+def setup_fortified(w):
+    setup_wave(10)(w)
+    fortify(w.g, w.rnd, walls=w.g.max_walls_base, cryo=5)
+
+def setup_bullets(w):
+    setup_wave(10)(w)
+    w.bullets = 200
+
+def setup_structures(w):
+    setup_wave(10)(w)
+    add_structures(w.g, w.rnd)
+
+SCENARIOS = {
+    'wave20_normal': {'setup': setup_wave(20)},
+    'survival_cap': {'setup': setup_survival_cap},
+    'fortified': {'setup': setup_fortified},
+    'bullets_200': {'setup': setup_bullets},
+    'structures': {'setup': setup_structures},
+}
+
+def prepare(w, subsystem):
+    # Untimed work before each call so every call sees a comparable world
+    g, rnd = w.g, w.rnd
+    g.clock.tick()
+    g.now, g.dt = g.clock.get_ticks(), g.clock.step
+    g.core_hp = g.core_max_hp
+    g.player.hp = g.player.max_hp
+    g.state = "PLAYING"
+    top_up_bullets(g, rnd, w.bullets)
+    if subsystem == 'update_heatmap':
+        g.heatmap_dirty = True
+    elif subsystem.startswith('update_heatmap:'):
+        edit_structure(w, subsystem.split(':')[1])
+    elif subsystem == 'process_grenades':
+        targets = list(g.enemies) or [g.player]
+        for _ in range(3):
+            cx, cy = rnd.choice(targets).rect.center
+            gr = Grenade(cx, cy, cx, cy)
+            gr.damage = 0
+            g.grenades_list.append(gr)
+
+def measure(w, subsystem, calls):
+    fn = getattr(w.g, subsystem.split(':')[0])
+    times = []
+    for _ in range(calls):
+        prepare(w, subsystem)
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1e6)
+    times.sort()
+    return {
+        'calls': calls,
+        'mean_us': statistics.fmean(times),
+        'median_us': times[len(times) // 2],
+        'p95_us': times[int(len(times) * 0.95) - 1],
+        'max_us': times[-1],
+    }
+
+def run_scenarios(seed, calls):
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        results[name] = {}
+        for subsystem in SUBSYSTEMS:
+            results[name][subsystem] = measure(build(scenario, seed), subsystem, calls)
+    return results
+
+def scaling_setup(kind, count):
+    def setup(w):
+        setup_wave(10)(w)
+        w.g.enemies.empty()
+        if kind == 'enemies':
+            add_enemies(w.g, w.rnd, count)
+        elif kind == 'bullets':
+            add_enemies(w.g, w.rnd, 20)
+            w.bullets = count
+        elif kind == 'structures':
+            add_enemies(w.g, w.rnd, 20)
+            fortify(w.g, w.rnd, walls=count, cryo=min(5, count // 4))
+    return {'setup': setup}
+
+CURVES = {
+    'enemies': ([10, 35, 60, 120, 240], ['update_enemies_logic', 'process_grenades', '_draw_game']),
+    'bullets': ([50, 100, 200, 400, 800], ['update_bullets', '_draw_game']),
+    'structures': ([0, 5, 10, 15, 20], ['update_heatmap', 'update_heatmap:near_core', 'update_heatmap:far', 'update_bullets']),
+}
+
+def run_scaling(seed, calls):
+    results = {}
+    for kind, (counts, subsystems) in CURVES.items():
+        for subsystem in subsystems:
+            points = []
+            for count in counts:
+                w = build(scaling_setup(kind, count), seed)
+                points.append([count, measure(w, subsystem, calls)['mean_us']])
+            results[f"{kind}:{subsystem}"] = points
+    return results
+
+def print_results(results, baseline=None):
+    def ratio(old, new):
+        return f" (x{new / old:.2f})" if old else ""
+
+    print(f"{'scenario':<16}{'subsystem':<26}{'mean us':>10}{'p95 us':>10}{'max us':>10}")
+    for name, subsystems in results['scenarios'].items():
+        for subsystem, r in subsystems.items():
+            line = f"{name:<16}{subsystem:<26}{r['mean_us']:>10.1f}{r['p95_us']:>10.1f}{r['max_us']:>10.1f}"
+            if baseline:
+                old = baseline.get('scenarios', {}).get(name, {}).get(subsystem)
+                if old: line += ratio(old['mean_us'], r['mean_us'])
+            print(line)
+    print()
+    for curve, points in results.get('scaling', {}).items():
+        old_points = dict(map(tuple, baseline.get('scaling', {}).get(curve, []))) if baseline else {}
+        cells = []
+        for count, mean in points:
+            cell = f"{count}:{mean:.0f}us"
+            if count in old_points: cell += ratio(old_points[count], mean)
+            cells.append(cell)
+        print(f"{curve:<36}" + "  ".join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-subsystem tick benchmarks for System Guardian")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--calls", type=int, default=200, help="timed calls per subsystem")
+    parser.add_argument("--no-scaling", action="store_true", help="skip the entity-count scaling curves")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {
+        'meta': {'seed': args.seed, 'calls': args.calls, 'python': platform.python_version(),
+                 'platform': platform.platform(), 'time': time.strftime("%Y-%m-%d %H:%M:%S")},
+        'scenarios': run_scenarios(args.seed, args.calls),
+    }
+    if not args.no_scaling:
+        results['scaling'] = run_scaling(args.seed, max(20, args.calls // 4))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    sys.exit(main())
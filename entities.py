@@ -1,8 +1,13 @@
 import pygame
-import random
 import math
+import heapq
+import itertools
+import numpy as np
 from settings import *
-from sprites import Bullet, Particle
+from grid import SpatialGroup
+from render import text_cache, atlas
+import sim
+from sim import rng
 
 class GridEntity(pygame.sprite.Sprite):
     def __init__(self, gx, gy, color):
@@ -12,11 +17,21 @@ class GridEntity(pygame.sprite.Sprite):
         self.target_pixel_pos = pygame.Vector2(self.pixel_pos)
         self.is_moving = False
         self.anim_speed = 0.2
-        self.image = pygame.Surface((TILE_SIZE-4, TILE_SIZE-4), pygame.SRCALPHA)
+        self.color = color
+        self._redraw()
         self.rect = self.image.get_rect(topleft=self.pixel_pos)
         self.hp = 100
         self.max_hp = 100
-        self.color = color
+
+    # Images come from the shared atlas, one per look; paint() draws a look
+    def image_key(self):
+        return (type(self).__name__, self.color)
+
+    def paint(self, image):
+        pass
+
+    def _redraw(self):
+        self.image = atlas.get(self.image_key(), (TILE_SIZE-4, TILE_SIZE-4), self.paint)
 
     def move_to(self, dx, dy, game):
         if self.is_moving: return False
@@ -39,144 +54,61 @@ class GridEntity(pygame.sprite.Sprite):
                 self.pixel_pos += diff * self.anim_speed
         self.rect.topleft = self.pixel_pos
 
-    def draw_hp_bar(self, surface, camera):
+    def render_rect(self, alpha):
+        # Where the sprite is `alpha` of the way to its position on the next tick
+        if not (self.is_moving and alpha): return self.rect
+        diff = self.target_pixel_pos - self.pixel_pos
+        if diff.length() >= 2: diff *= self.anim_speed
+        r = self.rect.copy()
+        r.topleft = self.pixel_pos + diff * alpha
+        return r
+
+    def draw_hp_bar(self, surface, camera, rect=None):
+        rect = self.rect if rect is None else rect
         if self.hp < self.max_hp:
             bar_w = TILE_SIZE - 8
             hp_w = bar_w * (max(0, self.hp) / self.max_hp)
-            pygame.draw.rect(surface, COLOR_HP_BAR_BG, camera.apply_rect(pygame.Rect(self.rect.x + 4, self.rect.y - 10, bar_w, 6)))
-            pygame.draw.rect(surface, COLOR_HP_BAR_FILL, camera.apply_rect(pygame.Rect(self.rect.x + 4, self.rect.y - 10, hp_w, 6)))
+            pygame.draw.rect(surface, COLOR_HP_BAR_BG, camera.apply_rect(pygame.Rect(rect.x + 4, rect.y - 10, bar_w, 6)))
+            pygame.draw.rect(surface, COLOR_HP_BAR_FILL, camera.apply_rect(pygame.Rect(rect.x + 4, rect.y - 10, hp_w, 6)))
 
 class Player(GridEntity):
     def __init__(self, gx, gy):
         super().__init__(gx, gy, COLOR_PLAYER)
-        pygame.draw.rect(self.image, self.color, (0, 0, TILE_SIZE-4, TILE_SIZE-4), border_radius=8)
         self.hp = 200
         self.max_hp = 200
         self.last_move_time = 0
         self.move_delay = 130
 
+    def paint(self, image):
+        pygame.draw.rect(image, self.color, (0, 0, TILE_SIZE-4, TILE_SIZE-4), border_radius=8)
+
 class Enemy(GridEntity):
     def __init__(self, gx, gy, wave_stats, color=COLOR_ENEMY):
         super().__init__(gx, gy, color)
-        pygame.draw.polygon(self.image, self.color, [(TILE_SIZE//2, 4), (TILE_SIZE-6, TILE_SIZE-6), (6, TILE_SIZE-6)])
         self.hp = wave_stats['hp']
         self.max_hp = self.hp
         self.damage = wave_stats['damage']
         self.base_move_cooldown = wave_stats['speed']
         self.move_cooldown = self.base_move_cooldown
-        self.last_move = pygame.time.get_ticks() + random.randint(0, 400)
+        self.last_move = sim.get_ticks() + rng.randint(0, 400)
         self.reward = 15
         self.is_slowed = False
 
-    def check_slow(self, game):
-        self.is_slowed = False
-        for cryo in game.cryo_nodes:
-            dist = abs(self.grid_pos.x - cryo.grid_pos.x) + abs(self.grid_pos.y - cryo.grid_pos.y)
-            if dist <= cryo.radius:
-                self.is_slowed = True
-                break
-        
-        if self.is_slowed:
-            self.move_cooldown = self.base_move_cooldown * 1.6
-        else:
-            self.move_cooldown = self.base_move_cooldown
+    def paint(self, image):
+        pygame.draw.polygon(image, self.color, [(TILE_SIZE//2, 4), (TILE_SIZE-6, TILE_SIZE-6), (6, TILE_SIZE-6)])
 
-    def draw_hp_bar(self, surface, camera):
-        super().draw_hp_bar(surface, camera)
+    def draw_hp_bar(self, surface, camera, rect=None):
+        super().draw_hp_bar(surface, camera, rect)
         if self.is_slowed:
-             center = camera.apply_rect(self.rect).center
+             center = camera.apply_rect(self.rect if rect is None else rect).center
              pygame.draw.circle(surface, COLOR_CRYO_NODE, (center[0], center[1] - 15), 4)
 
-    def ai_logic(self, player_gx, player_gy, heatmap, game):
-        self.check_slow(game)
-        
-        now = pygame.time.get_ticks()
-        if not self.is_moving and now - self.last_move > self.move_cooldown:
-            dist_to_player = abs(self.grid_pos.x - player_gx) + abs(self.grid_pos.y - player_gy)
-            dist_to_core = heatmap.get((int(self.grid_pos.x), int(self.grid_pos.y)), 9999)
-            
-            dx, dy = 0, 0
-            if dist_to_player < 7 and dist_to_player < (dist_to_core / 2):
-                dx = int(math.copysign(1, player_gx - self.grid_pos.x)) if player_gx != self.grid_pos.x else 0
-                if dx == 0:
-                    dy = int(math.copysign(1, player_gy - self.grid_pos.y)) if player_gy != self.grid_pos.y else 0
-            else:
-                curr_val = heatmap.get((int(self.grid_pos.x), int(self.grid_pos.y)), 9999)
-                for move in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    nx, ny = int(self.grid_pos.x + move[0]), int(self.grid_pos.y + move[1])
-                    if heatmap.get((nx, ny), 9999) < curr_val:
-                        dx, dy = move
-                        break
-            
-            if dx != 0 or dy != 0:
-                nx, ny = int(self.grid_pos.x + dx), int(self.grid_pos.y + dy)
-                target_wall = game.get_player_wall_at(nx, ny)
-                target_cryo = game.get_cryo_at(nx, ny)
-                
-                target = target_wall if target_wall else target_cryo
-                
-                if target:
-                    target.hp -= self.damage * 2
-                    if game.settings_particles:
-                        col = COLOR_PLAYER_WALL if target_wall else COLOR_CRYO_NODE
-                        game.particles.append(Particle(target.rect.centerx, target.rect.centery, col))
-                else:
-                    self.move_to(dx, dy, game)
-            self.last_move = now
-
 class ShooterEnemy(Enemy):
     def __init__(self, gx, gy, wave_stats):
         super().__init__(gx, gy, wave_stats, color=COLOR_ENEMY_RANGED)
         self.last_shot = 0
         self.shoot_delay = 1900
         self.reward = 40
-        self.has_los = False
-
-    def has_line_of_sight(self, target_pos, game):
-        start = self.rect.center
-        end = target_pos
-        dist = math.hypot(end[0] - start[0], end[1] - start[1])
-        if dist == 0: return True
-        steps = int(dist / (TILE_SIZE / 2)) 
-        for i in range(1, steps):
-            t = i / steps
-            x = start[0] + (end[0] - start[0]) * t
-            y = start[1] + (end[1] - start[1]) * t
-            gx, gy = int(x // TILE_SIZE), int(y // TILE_SIZE)
-            if game.is_tile_blocked(gx, gy):
-                return False
-        return True
-
-    def ai_logic(self, player_gx, player_gy, heatmap, game):
-        self.check_slow(game)
-        
-        now = pygame.time.get_ticks()
-        dist_to_player = abs(self.grid_pos.x - player_gx) + abs(self.grid_pos.y - player_gy)
-        
-        if dist_to_player < 8:
-            self.has_los = self.has_line_of_sight(game.player.rect.center, game)
-        else:
-            self.has_los = False
-
-        if now - self.last_shot > self.shoot_delay and dist_to_player < 8:
-            if self.has_los:
-                return 
-            else:
-                super().ai_logic(player_gx, player_gy, heatmap, game)
-                return
-        super().ai_logic(player_gx, player_gy, heatmap, game)
-
-    def try_shoot(self, player_pos):
-        if not self.has_los: return None
-        
-        now = pygame.time.get_ticks()
-        delay = self.shoot_delay * (1.3 if self.is_slowed else 1.0)
-        
-        if now - self.last_shot > delay:
-            self.last_shot = now
-            angle = math.atan2(player_pos.y - self.rect.centery, player_pos.x - self.rect.centerx)
-            return Bullet(self.rect.centerx, self.rect.centery, angle, is_enemy=True)
-        return None
 
 class ScoutEnemy(Enemy):
     def __init__(self, gx, gy, wave_stats):
@@ -187,29 +119,220 @@ class ScoutEnemy(Enemy):
         self.damage = 2.5
         self.reward = 10
 
-class Bullet:
-    def __init__(self, x, y, angle, is_enemy=False, damage=10, speed=13.5, max_dist=1000, color=COLOR_BULLET):
-        self.start_pos = pygame.Vector2(x, y)
-        self.pos = pygame.Vector2(x, y)
-        self.vel = pygame.Vector2(math.cos(angle), math.sin(angle)) * speed
-        self.active = True
-        self.is_enemy = is_enemy
-        self.damage = damage
-        self.max_dist = max_dist
-        self.rect = pygame.Rect(x-4, y-4, 8, 8)
-        self.color = color
+class EnemyStore:
+    # Structure-of-arrays movement, cooldown and contact state for every enemy
+    # in an EnemyGroup, packed in slot order. Hit points stay on the sprites,
+    # since only bullet and grenade hits touch them. update() mirrors the
+    # fields other systems read (grid_pos, rect, is_slowed) back onto the
+    # sprites that changed.
+    #
+    # Enemies sit in a heap keyed by the tick of their next move decision and
+    # shooters in a second heap keyed by the tick their gun is ready, so a
+    # frame only touches enemies that are due. A heap entry is dropped when its
+    # stamp no longer matches, i.e. when a slow change rescheduled the enemy.
+    FIELDS = {
+        'grid': ((2,), np.int32), 'pos': ((2,), np.float64), 'target': ((2,), np.float64),
+        'moving': ((), np.bool_), 'last_move': ((), np.int64), 'cooldown': ((), np.float64),
+        'slowed': ((), np.bool_), 'damage': ((), np.float64), 'shooter': ((), np.bool_),
+        'last_shot': ((), np.int64), 'shoot_delay': ((), np.float64),
+        'move_due': ((), np.int64), 'stamp': ((), np.int64),
+    }
 
-    def update(self, walls):
-        self.pos += self.vel
-        self.rect.center = (int(self.pos.x), int(self.pos.y))
-        
-        if self.pos.distance_to(self.start_pos) > self.max_dist:
-            self.active = False
-            return
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.count = 0
+        self.sprites = []
+        self.moves = []
+        self.shots = []
+        self.armed = set()
+        self.pending = []
+        self.slow_version = None
+        self.seq = itertools.count()
+        for name, (shape, dtype) in self.FIELDS.items():
+            setattr(self, name, np.zeros((0,) + shape, dtype=dtype))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for name, (shape, dtype) in self.FIELDS.items():
+            arr = np.zeros((capacity,) + shape, dtype=dtype)
+            arr[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, arr)
+        self.capacity = capacity
+
+    def attach(self, e):
+        if self.count == self.capacity: self._grow(self.capacity * 2)
+        i = self.count
+        self.grid[i] = (int(e.grid_pos.x), int(e.grid_pos.y))
+        self.pos[i] = e.pixel_pos
+        self.target[i] = e.target_pixel_pos
+        self.moving[i] = e.is_moving
+        self.last_move[i] = e.last_move
+        self.cooldown[i] = e.base_move_cooldown
+        self.slowed[i] = e.is_slowed
+        self.damage[i] = e.damage
+        self.shooter[i] = isinstance(e, ShooterEnemy)
+        self.last_shot[i] = getattr(e, 'last_shot', 0)
+        self.shoot_delay[i] = getattr(e, 'shoot_delay', 0)
+        e.slot = i
+        self.sprites.append(e)
+        self.count += 1
+        self.pending.append(e)
+        if self.shooter[i]: self._arm_at(e, i)
+
+    def detach(self, e):
+        i, last = e.slot, self.count - 1
+        for name in self.FIELDS:
+            arr = getattr(self, name)
+            arr[i] = arr[last]
+        moved = self.sprites.pop()
+        if moved is not e:
+            self.sprites[i] = moved
+            moved.slot = i
+        self.count -= 1
+        e.slot = None
+        self.armed.discard(e)
+
+    # "now - last > delay" on integer ticks is "now >= last + floor(delay) + 1"
+    def _schedule(self, idx):
+        cooldown = np.where(self.slowed[idx], self.cooldown[idx] * 1.6, self.cooldown[idx])
+        self.move_due[idx] = self.last_move[idx] + np.floor(cooldown).astype(np.int64) + 1
+        self.stamp[idx] += 1
+        for i, due, stamp in zip(idx.tolist(), self.move_due[idx].tolist(), self.stamp[idx].tolist()):
+            heapq.heappush(self.moves, (due, next(self.seq), self.sprites[i], stamp))
 
-        gx, gy = int(self.pos.x // TILE_SIZE), int(self.pos.y // TILE_SIZE)
-        if (gx, gy) in walls: self.active = False
-        if not (0 <= self.pos.x < 4000 and 0 <= self.pos.y < 4000): self.active = False
+    def _arm_at(self, e, i):
+        due = int(self.last_shot[i]) + int(self.shoot_delay[i]) + 1
+        heapq.heappush(self.shots, (due, next(self.seq), e))
+
+    def _refresh_slow(self, game, idx):
+        slowed = game.slow_field.count[self.grid[idx, 0], self.grid[idx, 1]] > 0
+        flipped = idx[slowed != self.slowed[idx]]
+        self.slowed[idx] = slowed
+        for i in flipped.tolist():
+            self.sprites[i].is_slowed = bool(self.slowed[i])
+        return flipped
+
+    def _line_of_sight(self, game, idx, pgx, pgy):
+        vis, r = game.visibility, game.visibility.radius
+        gx, gy = self.grid[idx, 0], self.grid[idx, 1]
+        los = np.abs(gx - pgx) + np.abs(gy - pgy) < 8
+        near = idx[los]
+        los[los] = vis.visible[self.grid[near, 0] - vis.origin[0] + r, self.grid[near, 1] - vis.origin[1] + r]
+        return los
+
+    def update(self, game, now):
+        # New enemies and those that just took a step read their tile's slow
+        # state at the start of the next frame, then get their next due time
+        if self.pending:
+            idx = np.array([e.slot for e in self.pending if e.slot is not None], dtype=np.intp)
+            self.pending = []
+            self._refresh_slow(game, idx)
+            self._schedule(idx)
+        n = self.count
+        if not n: return
+        if self.slow_version != game.slow_field.version:
+            self.slow_version = game.slow_field.version
+            self._schedule(self._refresh_slow(game, np.arange(n)))
+        pgx, pgy = int(game.player.grid_pos.x), int(game.player.grid_pos.y)
+
+        while self.shots and self.shots[0][0] <= now:
+            e = heapq.heappop(self.shots)[2]
+            if e.slot is not None: self.armed.add(e)
+        armed = np.array(sorted(e.slot for e in self.armed), dtype=np.intp)
+        # Armed shooters with the player in sight hold position to fire
+        sighted = armed[self._line_of_sight(game, armed, pgx, pgy)]
+
+        due = []
+        while self.moves and self.moves[0][0] <= now:
+            _, _, e, stamp = heapq.heappop(self.moves)
+            if e.slot is not None and self.stamp[e.slot] == stamp: due.append(e.slot)
+        due = np.array(sorted(due), dtype=np.intp)
+        waiting = self.moving[due] | np.isin(due, sighted)
+        for i in due[waiting].tolist():
+            heapq.heappush(self.moves, (now + 1, next(self.seq), self.sprites[i], int(self.stamp[i])))
+        ready = due[~waiting]
+        if len(ready):
+            dist_player = np.abs(self.grid[ready, 0] - pgx) + np.abs(self.grid[ready, 1] - pgy)
+            self._step(game, ready, pgx, pgy, dist_player, now)
+            self.pending.extend(self.sprites[i] for i in ready.tolist())
+
+        moving = np.flatnonzero(self.moving[:n])
+        if len(moving):
+            d = self.target[moving] - self.pos[moving]
+            arrived = np.sqrt((d * d).sum(axis=1)) < 2
+            self.pos[moving] = np.where(arrived[:, None], self.target[moving], self.pos[moving] + d * 0.2)
+            self.moving[moving[arrived]] = False
+        for i in moving.tolist():
+            e = self.sprites[i]
+            e.grid_pos = pygame.Vector2(self.grid[i].tolist())
+            e.target_pixel_pos = pygame.Vector2(self.target[i].tolist())
+            e.pixel_pos = pygame.Vector2(self.pos[i].tolist())
+            e.is_moving = bool(self.moving[i])
+            e.rect.topleft = e.pixel_pos
+            game.enemies.moved(e)
+
+        if len(sighted):
+            delay = np.where(self.slowed[sighted], self.shoot_delay[sighted] * 1.3, self.shoot_delay[sighted])
+            for i in sighted[now - self.last_shot[sighted] > delay].tolist():
+                e = self.sprites[i]
+                self.last_shot[i] = now
+                self.armed.discard(e)
+                self._arm_at(e, i)
+                px, py = game.player.rect.center
+                angle = math.atan2(py - e.rect.centery, px - e.rect.centerx)
+                game.bullets.spawn(e.rect.centerx, e.rect.centery, angle, is_enemy=True)
+
+    def _step(self, game, idx, pgx, pgy, dist_player, now):
+        x, y = self.grid[idx, 0], self.grid[idx, 1]
+        chase = (dist_player < 7) & (dist_player < game.heatmap.dist[x, y] / 2)
+        sx, sy = game.heatmap.steps_at(x, y)
+        cx = np.sign(pgx - x)
+        dx = np.where(chase, cx, sx)
+        dy = np.where(chase, np.where(cx == 0, np.sign(pgy - y), 0), sy)
+        nx, ny = x + dx, y + dy
+        size = game.map_size
+        inside = ((dx != 0) | (dy != 0)) & (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+        blocked = np.zeros(len(idx), dtype=bool)
+        blocked[inside] = game.occupancy.blocked[nx[inside], ny[inside]]
+
+        # Enemies walking into a player wall or cryo node attack it instead
+        for j in np.flatnonzero(inside & blocked).tolist():
+            target = game.occupancy.get(nx[j], ny[j])
+            if not isinstance(target, (PlayerWall, CryoNode)): continue
+            game.damage.hit(target, float(self.damage[idx[j]]) * 2)
+            if game.settings_particles:
+                col = COLOR_PLAYER_WALL if isinstance(target, PlayerWall) else COLOR_CRYO_NODE
+                game.particles.emit(target.rect.centerx, target.rect.centery, col)
+
+        go = inside & ~blocked
+        moved = idx[go]
+        self.grid[moved, 0] = nx[go]
+        self.grid[moved, 1] = ny[go]
+        self.target[moved] = self.grid[moved] * TILE_SIZE
+        self.moving[moved] = True
+        self.last_move[idx] = now
+
+    def contacts(self, core, player):
+        # Damage of every enemy standing on the core, and how many stand on the player
+        n = self.count
+        gx, gy = self.grid[:n, 0], self.grid[:n, 1]
+        at_core = (gx == core[0]) & (gy == core[1])
+        at_player = ~at_core & (gx == player[0]) & (gy == player[1])
+        return self.damage[:n][at_core].tolist(), int(at_player.sum())
+
+class EnemyGroup(SpatialGroup):
+    # Spatial group whose members are also tracked by an EnemyStore
+    def __init__(self, store, *sprites):
+        self.store = store
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.store.attach(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.store.detach(sprite)
 
 class Grenade:
     def __init__(self, start_x, start_y, target_x, target_y):
@@ -240,54 +363,53 @@ class BonusItem(pygame.sprite.Sprite):
         super().__init__()
         self.grid_pos = pygame.Vector2(gx, gy)
         self.rect = pygame.Rect(gx * TILE_SIZE + 10, gy * TILE_SIZE + 10, 28, 28)
-        self.image = pygame.Surface((28, 28), pygame.SRCALPHA)
         self.type = type
-        self.draw_icon()
+        self.image = atlas.get(('BonusItem', type), (28, 28), self.draw_icon)
 
-    def draw_icon(self):
+    def draw_icon(self, image):
         if self.type == "HEALTH":
-            pygame.draw.rect(self.image, COLOR_BONUS_HP, (0, 0, 28, 28), border_radius=4)
-            pygame.draw.rect(self.image, COLOR_ICON_FG, (11, 4, 6, 20))
-            pygame.draw.rect(self.image, COLOR_ICON_FG, (4, 11, 20, 6))
+            pygame.draw.rect(image, COLOR_BONUS_HP, (0, 0, 28, 28), border_radius=4)
+            pygame.draw.rect(image, COLOR_ICON_FG, (11, 4, 6, 20))
+            pygame.draw.rect(image, COLOR_ICON_FG, (4, 11, 20, 6))
         elif self.type == "CORE_REPAIR":
-            pygame.draw.rect(self.image, COLOR_BONUS_CORE, (0, 0, 28, 28), border_radius=4)
-            pygame.draw.circle(self.image, COLOR_ICON_FG, (14, 14), 8)
+            pygame.draw.rect(image, COLOR_BONUS_CORE, (0, 0, 28, 28), border_radius=4)
+            pygame.draw.circle(image, COLOR_ICON_FG, (14, 14), 8)
         elif self.type == "GRENADE_BOX":
-            pygame.draw.rect(self.image, COLOR_GRENADE_BONUS, (0, 0, 28, 28), border_radius=4)
-            pygame.draw.circle(self.image, COLOR_ICON_DARK, (14, 14), 6)
+            pygame.draw.rect(image, COLOR_GRENADE_BONUS, (0, 0, 28, 28), border_radius=4)
+            pygame.draw.circle(image, COLOR_ICON_DARK, (14, 14), 6)
         elif self.type == "WEAPON_CRATE":
-            pygame.draw.rect(self.image, COLOR_WEAPON_CRATE, (0, 0, 28, 28), border_radius=4)
-            pygame.draw.line(self.image, (0,0,0), (0,0), (28,28), 2)
-            pygame.draw.line(self.image, (0,0,0), (28,0), (0,28), 2)
+            pygame.draw.rect(image, COLOR_WEAPON_CRATE, (0, 0, 28, 28), border_radius=4)
+            pygame.draw.line(image, (0,0,0), (0,0), (28,28), 2)
+            pygame.draw.line(image, (0,0,0), (28,0), (0,28), 2)
         elif self.type.startswith("BUFF_"):
-            pygame.draw.circle(self.image, COLOR_BUFF, (14, 14), 14)
-            font = pygame.font.SysFont("Consolas", 14, bold=True)
+            pygame.draw.circle(image, COLOR_BUFF, (14, 14), 14)
             t = self.type.split("_")[1][0]
-            txt = font.render(t, True, (255, 255, 255))
-            self.image.blit(txt, txt.get_rect(center=(14, 14)))
+            txt = text_cache.render(t, 14, (255, 255, 255))
+            image.blit(txt, txt.get_rect(center=(14, 14)))
 
 
 class EnemySpawner(GridEntity):
     def __init__(self, gx, gy):
+        self.scouts_produced = 0
+        self.max_scouts = 8
         super().__init__(gx, gy, COLOR_SPAWNER)
         self.hp = 350
         self.max_hp = 350
-        self.last_spawn = pygame.time.get_ticks()
+        self.last_spawn = sim.get_ticks()
         self.spawn_delay = 5500
-        self.scouts_produced = 0
-        self.max_scouts = 8
         self.reward = 150
-        self._redraw()
 
-    def _redraw(self):
-        self.image.fill(COLOR_TRANSPARENT)
-        pygame.draw.rect(self.image, self.color, (2, 2, TILE_SIZE-8, TILE_SIZE-8), border_radius=6)
+    def image_key(self):
+        return ('EnemySpawner', self.scouts_produced < self.max_scouts)
+
+    def paint(self, image):
+        pygame.draw.rect(image, self.color, (2, 2, TILE_SIZE-8, TILE_SIZE-8), border_radius=6)
         if self.scouts_produced < self.max_scouts:
-            pygame.draw.circle(self.image, (255, 255, 255), (TILE_SIZE//2-2, TILE_SIZE//2-2), TILE_SIZE//4)
+            pygame.draw.circle(image, (255, 255, 255), (TILE_SIZE//2-2, TILE_SIZE//2-2), TILE_SIZE//4)
 
     def get_adjacent_free_tile(self, game):
         neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        random.shuffle(neighbors)
+        rng.shuffle(neighbors)
         for dx, dy in neighbors:
             nx, ny = int(self.grid_pos.x + dx), int(self.grid_pos.y + dy)
             if 0 <= nx < game.map_size and 0 <= ny < game.map_size:
@@ -298,31 +420,37 @@ class EnemySpawner(GridEntity):
 class EnergyNode(GridEntity):
     def __init__(self, gx, gy):
         super().__init__(gx, gy, COLOR_NODE)
-        pygame.draw.circle(self.image, self.color, (TILE_SIZE//2-2, TILE_SIZE//2-2), TILE_SIZE//3)
         self.hp = 250
         self.max_hp = 250
         self.reward = 70
 
+    def paint(self, image):
+        pygame.draw.circle(image, self.color, (TILE_SIZE//2-2, TILE_SIZE//2-2), TILE_SIZE//3)
+
 class PlayerWall(GridEntity):
     def __init__(self, gx, gy):
         super().__init__(gx, gy, COLOR_PLAYER_WALL)
-        pygame.draw.rect(self.image, self.color, (0, 0, TILE_SIZE-4, TILE_SIZE-4), border_radius=4)
         self.hp = 250
         self.max_hp = 250
-        self.spawn_time = pygame.time.get_ticks()
+        self.spawn_time = sim.get_ticks()
         self.lifetime = 60000
 
+    def paint(self, image):
+        pygame.draw.rect(image, self.color, (0, 0, TILE_SIZE-4, TILE_SIZE-4), border_radius=4)
+
 class CryoNode(GridEntity):
     def __init__(self, gx, gy):
         super().__init__(gx, gy, COLOR_CRYO_NODE)
-        pygame.draw.rect(self.image, self.color, (4, 4, TILE_SIZE-8, TILE_SIZE-8), border_radius=4)
-        pygame.draw.circle(self.image, COLOR_CRYO_INNER, (TILE_SIZE//2-2, TILE_SIZE//2-2), 8)
         self.hp = 150
         self.max_hp = 150
         self.radius = 2
-        self.spawn_time = pygame.time.get_ticks()
+        self.spawn_time = sim.get_ticks()
         self.lifetime = 60000
 
+    def paint(self, image):
+        pygame.draw.rect(image, self.color, (4, 4, TILE_SIZE-8, TILE_SIZE-8), border_radius=4)
+        pygame.draw.circle(image, COLOR_CRYO_INNER, (TILE_SIZE//2-2, TILE_SIZE//2-2), 8)
+
     def draw_range(self, surface, camera):
         radius_px = (self.radius * TILE_SIZE) + (TILE_SIZE // 2)
         center = camera.apply_rect(self.rect).center
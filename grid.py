@@ -0,0 +1,173 @@
+import pygame
+import numpy as np
+from settings import TILE_SIZE
+
+WALL = "WALL"
+
+def cells_for_rect(rect, cell_size):
+    return [(cx, cy)
+            for cx in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1)
+            for cy in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1)]
+
+class OccupancyGrid:
+    def __init__(self, size, wall_mask):
+        self.size = size
+        self.blocked = np.array(wall_mask, dtype=bool)
+        # cells is indexed gy * size + gx, i.e. the transposed mask flattened
+        cells = np.full(size * size, None, dtype=object)
+        cells[self.blocked.T.ravel()] = WALL
+        self.cells = cells.tolist()
+        self.dirty = set()
+        self.version = 0
+
+    def get(self, gx, gy):
+        gx, gy = int(gx), int(gy)
+        if 0 <= gx < self.size and 0 <= gy < self.size:
+            return self.cells[gy * self.size + gx]
+        return None
+
+    def is_blocked(self, gx, gy):
+        return self.get(gx, gy) is not None
+
+    def structures_in(self, rect):
+        found = []
+        for gx, gy in cells_for_rect(rect, TILE_SIZE):
+            s = self.get(gx, gy)
+            if s is not None and s is not WALL and s.rect.colliderect(rect):
+                found.append(s)
+        return found
+
+    def place(self, sprite):
+        gx, gy = int(sprite.grid_pos.x), int(sprite.grid_pos.y)
+        if 0 <= gx < self.size and 0 <= gy < self.size:
+            self.cells[gy * self.size + gx] = sprite
+            self.blocked[gx, gy] = True
+            self._mark_dirty(sprite, gx, gy)
+
+    def clear(self, sprite):
+        gx, gy = int(sprite.grid_pos.x), int(sprite.grid_pos.y)
+        if 0 <= gx < self.size and 0 <= gy < self.size:
+            idx = gy * self.size + gx
+            if self.cells[idx] is sprite:
+                self.cells[idx] = None
+                self.blocked[gx, gy] = False
+                self._mark_dirty(sprite, gx, gy)
+
+    def _mark_dirty(self, sprite, gx, gy):
+        self.version += 1
+        # Structures with an area effect (cryo) change path costs across their whole radius
+        r = getattr(sprite, 'radius', 0)
+        for dx in range(-r, r + 1):
+            span = r - abs(dx)
+            for dy in range(-span, span + 1):
+                self.dirty.add((gx + dx, gy + dy))
+
+    def pop_dirty(self):
+        tiles, self.dirty = self.dirty, set()
+        return tiles
+
+class StructureGroup(pygame.sprite.Group):
+    # Group for static structures; keeps the occupancy grid in sync on add, kill and empty
+    def __init__(self, grid, *sprites):
+        self.grid = grid
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.grid.place(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.grid.clear(sprite)
+
+class SlowField:
+    # Per-tile count of cryo nodes whose radius covers the tile
+    def __init__(self, size):
+        self.size = size
+        self.count = np.zeros((size, size), dtype=np.int16)
+        self.version = 0
+
+    def _apply(self, sprite, delta):
+        self.version += 1
+        gx, gy, r = int(sprite.grid_pos.x), int(sprite.grid_pos.y), sprite.radius
+        for dx in range(-r, r + 1):
+            x = gx + dx
+            if not 0 <= x < self.size: continue
+            span = r - abs(dx)
+            self.count[x, max(0, gy - span):min(self.size, gy + span + 1)] += delta
+
+    def add(self, sprite):
+        self._apply(sprite, 1)
+
+    def remove(self, sprite):
+        self._apply(sprite, -1)
+
+    def is_slowed(self, gx, gy):
+        return self.count[int(gx), int(gy)] > 0
+
+class CryoGroup(StructureGroup):
+    # Structure group that also keeps the slow field in sync with its nodes
+    def __init__(self, grid, slow_field, *sprites):
+        self.slow_field = slow_field
+        super().__init__(grid, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.slow_field.add(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.slow_field.remove(sprite)
+
+class SpatialHash:
+    # Buckets sprites by the cells their rect overlaps. Buckets are dicts so
+    # queries come back in a stable order.
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.keys = {}
+
+    def insert(self, sprite):
+        keys = cells_for_rect(sprite.rect, self.cell_size)
+        self.keys[sprite] = keys
+        for k in keys:
+            self.cells.setdefault(k, {})[sprite] = None
+
+    def remove(self, sprite):
+        for k in self.keys.pop(sprite, ()):
+            bucket = self.cells[k]
+            del bucket[sprite]
+            if not bucket: del self.cells[k]
+
+    def move(self, sprite):
+        keys = cells_for_rect(sprite.rect, self.cell_size)
+        if keys != self.keys.get(sprite):
+            self.remove(sprite)
+            self.insert(sprite)
+
+    def query(self, rect):
+        found = {}
+        for k in cells_for_rect(rect, self.cell_size):
+            bucket = self.cells.get(k)
+            if bucket: found.update(bucket)
+        return found
+
+class SpatialGroup(pygame.sprite.Group):
+    # Group for moving sprites; call moved() after a sprite's rect changes
+    def __init__(self, *sprites):
+        self.hash = SpatialHash(TILE_SIZE)
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.hash.insert(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.hash.remove(sprite)
+
+    def moved(self, sprite):
+        self.hash.move(sprite)
+
+    def query(self, rect):
+        return [s for s in self.hash.query(rect) if s.rect.colliderect(rect)]
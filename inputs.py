@@ -0,0 +1,155 @@
+import atexit
+import io
+import struct
+import zlib
+from collections import deque
+import pygame
+import snapshot
+
+# Where SystemGuardian gets its per-frame input. handle_input, the menus and
+# the aim code read events, held keys and the mouse from here instead of from
+# pygame, so a session can be recorded and later replayed tick for tick.
+#
+# Log format: a small header, then a zlib stream of records
+#   F  one per frame: frame time, mouse, held keys, key presses
+#   B  a buy_item call during the preceding frame, checked on replay
+#   S  a snapshot loaded during the preceding frame, stored whole
+
+MAGIC = b"SGREC"
+VERSION = 1
+HEADER = struct.Struct("<5sBQHB")
+FRAME = struct.Struct("<HhhBHB")
+# Only keys the game reacts to are logged; a press is stored as its index here
+KEYS = (pygame.K_ESCAPE, pygame.K_b, pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5,
+        pygame.K_SPACE, pygame.K_F3, pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+QUIT = 255
+FLUSH_FRAMES = 300
+
+class LiveInput:
+    def __init__(self):
+        self.events = []
+        self.keys = dict.fromkeys(KEYS, False)
+        self.mouse_pos = (0, 0)
+        self.mouse_down = False
+
+    def poll(self, frame_clock):
+        # Waits out the frame and samples input; returns the frame time in ms
+        dt = frame_clock.tick()
+        self.events = pygame.event.get()
+        self.keys = pygame.key.get_pressed()
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.mouse_down = pygame.mouse.get_pressed()[0]
+        return dt
+
+    def bought(self, category, item_id, target_slot):
+        pass
+
+    def read_snapshot(self, path):
+        return snapshot.read(path)
+
+class InputRecorder(LiveInput):
+    # Live input that also logs every frame to path. The menus quit with
+    # sys.exit, so the log is closed at exit; until then it is flushed every
+    # few seconds and a crash loses at most the last few seconds.
+    def __init__(self, path, seed, map_size, save_exists):
+        super().__init__()
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, map_size, save_exists))
+        self.zip = zlib.compressobj(6)
+        self.frames = 0
+        atexit.register(self.close)
+
+    def _write(self, data):
+        self.file.write(self.zip.compress(data))
+
+    def poll(self, frame_clock):
+        dt = super().poll(frame_clock)
+        held = sum(1 << i for i, k in enumerate(KEYS) if self.keys[k])
+        presses = [QUIT if e.type == pygame.QUIT else KEYS.index(e.key) for e in self.events
+                   if e.type == pygame.QUIT or e.type == pygame.KEYDOWN and e.key in KEYS]
+        self._write(b"F" + FRAME.pack(min(dt, 0xFFFF), *self.mouse_pos, self.mouse_down, held, len(presses)) + bytes(presses))
+        self.frames += 1
+        if self.frames % FLUSH_FRAMES == 0: self.flush()
+        return dt
+
+    def bought(self, category, item_id, target_slot):
+        self._write(b"B" + _pack_text(f"{category}:{item_id}:{target_slot}"))
+
+    def read_snapshot(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        self._write(b"S" + struct.pack("<I", len(data)) + data)
+        return snapshot.read(io.BytesIO(data))
+
+    def flush(self):
+        self.file.write(self.zip.flush(zlib.Z_SYNC_FLUSH))
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed: return
+        self.file.write(self.zip.flush())
+        self.file.close()
+
+class InputReplay(LiveInput):
+    # Plays a recorded log back. Frame times come from the log, so the game
+    # takes the same number of sim steps and renders with the same
+    # interpolation as the recorded session. With realtime=False frames aren't
+    # paced. A purchase that doesn't match the log raises, since from there on
+    # the replay no longer follows the recording.
+    def __init__(self, path, realtime=False):
+        super().__init__()
+        with open(path, "rb") as f:
+            magic, version, self.seed, self.map_size, self.save_exists = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION: raise ValueError(f"{path} is not a version {VERSION} input log")
+            # decompressobj rather than zlib.decompress: a log cut off by a crash has no end marker
+            self.data = zlib.decompressobj().decompress(f.read())
+        self.offset = 0
+        self.realtime = realtime
+        self.frame = 0
+        self.purchases = deque()
+        self.snapshots = deque()
+
+    def _take(self, size):
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def poll(self, frame_clock):
+        if self.realtime: frame_clock.tick()
+        if pygame.display.get_surface(): pygame.event.pump()
+        if self.purchases: raise RuntimeError(f"replay diverged before frame {self.frame}: missed {self.purchases[0]}")
+        if self.offset + 1 + FRAME.size > len(self.data):
+            # End of the log: quit like the recorded session did
+            self.events = [pygame.event.Event(pygame.QUIT)]
+            return 0
+        self.offset += 1
+        dt, mx, my, mouse_down, held, count = FRAME.unpack(self._take(FRAME.size))
+        self.events = [pygame.event.Event(pygame.QUIT) if i == QUIT else pygame.event.Event(pygame.KEYDOWN, key=KEYS[i])
+                       for i in self._take(count)]
+        self.keys = {k: bool(held >> i & 1) for i, k in enumerate(KEYS)}
+        self.mouse_pos = (mx, my)
+        self.mouse_down = bool(mouse_down)
+        self.frame += 1
+        while self.offset < len(self.data) and self.data[self.offset:self.offset + 1] != b"F":
+            tag = self._take(1)
+            if tag == b"B":
+                self.purchases.append(self._take(self._take(1)[0]).decode())
+            elif tag == b"S":
+                size, = struct.unpack("<I", self._take(4))
+                self.snapshots.append(self._take(size))
+            else:
+                raise ValueError(f"bad record {tag!r} in input log")
+        return dt
+
+    def bought(self, category, item_id, target_slot):
+        got = f"{category}:{item_id}:{target_slot}"
+        expected = self.purchases.popleft() if self.purchases else None
+        if got != expected: raise RuntimeError(f"replay diverged at frame {self.frame}: bought {got}, log has {expected}")
+
+    def read_snapshot(self, path):
+        if not self.snapshots: raise RuntimeError(f"replay diverged at frame {self.frame}: no snapshot in the log")
+        return snapshot.read(io.BytesIO(self.snapshots.popleft()))
+
+def _pack_text(text):
+    data = text.encode()
+    return bytes([len(data)]) + data
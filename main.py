@@ -1,35 +1,80 @@
+import time
+STARTED = time.perf_counter()
 import pygame
-import random
 import math
 import sys
-import heapq
-import json
+import argparse
 import os
+import numpy as np
 
 from settings import *
 from utils import Camera
-from sprites import Particle, Bullet, Grenade
+from render import text_cache, StructureLayer, DirtyRects
+import sim
+from sim import rng, fx_rng, RealClock, SimClock, DamageQueue
+from profiling import FrameProfiler, StartupProfile
+from inputs import LiveInput, InputRecorder
+import snapshot
+import mapgen
+from snapshot import SnapshotWriter
+from grid import OccupancyGrid, StructureGroup, CryoGroup, SlowField, WALL
+from pathfinding import CoreHeatmap, INF
+from visibility import VisibilityField
+from sprites import ParticleSystem, BulletPool, Grenade
 from entities import (Player, Enemy, ShooterEnemy, ScoutEnemy, EnemySpawner, EnergyNode, PlayerWall, 
-                      CryoNode, BonusItem)
+                      CryoNode, BonusItem, EnemyStore, EnemyGroup)
 
 class SystemGuardian:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("System Guardian")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Consolas", 20, bold=True)
-        self.map_size = 64
+    def __init__(self, headless=False, seed=None, clock=None, map_size=MAP_SIZE, input_source=None,
+                 defer_world=False, startup=None):
+        # Game logic always runs on a fixed-step SimClock; run() paces it
+        # against real time. Headless games never open a window or render, so
+        # step() runs as fast as the CPU allows. With defer_world the menu
+        # comes up before any map exists; NEW GAME or CONTINUE builds one
+        self.headless = headless
+        self.startup = startup or StartupProfile()
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        # Only the subsystems the game uses; pygame.init() would also open
+        # audio and scan joysticks, which can take a while on some systems
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark("pygame init")
+        if headless:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("System Guardian")
+        self.startup.mark("display")
+        self.clock = clock or SimClock()
+        self.frame_clock = RealClock(RENDER_FPS)
+        self.input = input_source or LiveInput()
+        self.alpha = 0
+        sim.use_clock(self.clock)
+        if seed is not None: rng.seed(seed); fx_rng.seed(seed)
+        self.text_cache = text_cache
+        if not headless: self.text_cache.load_in_background(self.startup.background("font scan"))
+        self.map_size = map_size
         self.state = "MAIN_MENU" 
         self.return_state = "MAIN_MENU"
         self.overcharge_finish = 0
         
         self.show_fps = False
+        self.profiler = FrameProfiler()
+        self.profiler_lines = []
+        self.dirty = DirtyRects()
         self.settings_particles = True
         self.click_handled = False
         
-        self.save_file = "savegame.json"
-        self.save_exists = os.path.exists(self.save_file)
+        self.save_file = None if headless else SAVE_FILE
+        self.snapshots = SnapshotWriter()
+        self.map_cache = None if headless else MAP_CACHE_DIR
+        # A block of bare floor tiles that paint_terrain blits before filling in walls
+        floor = np.empty((TILE_SIZE, TILE_SIZE, 3), dtype=np.uint8)
+        floor[...] = COLOR_FLOOR
+        floor[1:-1, 1:-1] = COLOR_BG
+        self.floor_block = pygame.surfarray.make_surface(np.tile(floor, (CHUNK_TILES, CHUNK_TILES, 1)))
+        self.save_exists = bool(self.save_file) and os.path.exists(self.save_file)
 
         self.purchased_weapons = ['PISTOL']
         self.unlocked_weapons = ['PISTOL']
@@ -45,9 +90,19 @@ class SystemGuardian:
         self.survival_time_left = 0
         self.last_survival_spawn = 0
 
-        self.reset()
+        self.world_ready = False
+        self.startup.mark("setup")
+        if not defer_world:
+            self.reset()
+            self.startup.mark("world")
+
+    def reset(self, seed=None):
+        if seed is not None: rng.seed(seed); fx_rng.seed(seed)
+        self._reset_run()
+        self.generate_map()
+        self._build_world()
 
-    def reset(self):
+    def _reset_run(self):
         self.wave = 0
         self.money = 300
         self.overcharge_finish = 0
@@ -61,16 +116,6 @@ class SystemGuardian:
         self.max_walls_extra = 0
         self.active_buffs = []
         
-        self.enemies = pygame.sprite.Group()
-        self.spawners = pygame.sprite.Group()
-        self.nodes = pygame.sprite.Group()
-        self.player_walls = pygame.sprite.Group()
-        self.cryo_nodes = pygame.sprite.Group()
-        self.bonuses = pygame.sprite.Group()
-        self.bullets = []
-        self.particles = []
-        self.grenades_list = []
-        
         self.inventory = [{'type': 'WEAPON', 'name': 'PISTOL'}, None, None, None, None]
         self.unlocked_weapons = ['PISTOL']
         self.purchased_weapons = ['PISTOL']
@@ -81,43 +126,63 @@ class SystemGuardian:
         
         self.wave_type = "NORMAL"
 
-        self.generate_map()
-        self.build_map_surface()
+    def _build_world(self):
+        # Everything derived from the map; expects self.wall_mask
+        self.structure_layer = StructureLayer(self.map_size * TILE_SIZE, CHUNK_TILES * TILE_SIZE, self.paint_terrain)
+        self.structure_layer_key = None
+        self.world_covers_screen = self.map_size * TILE_SIZE >= max(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        self.occupancy = OccupancyGrid(self.map_size, self.wall_mask)
+        self.visibility = VisibilityField(self.occupancy)
+        self.slow_field = SlowField(self.map_size)
+        self.enemy_store = EnemyStore()
+        self.enemies = EnemyGroup(self.enemy_store)
+        self.spawners = StructureGroup(self.occupancy)
+        self.nodes = StructureGroup(self.occupancy)
+        self.player_walls = StructureGroup(self.occupancy)
+        self.cryo_nodes = CryoGroup(self.occupancy, self.slow_field)
+        self.bonuses = pygame.sprite.Group()
+        self.bullets = BulletPool(bound=self.map_size * TILE_SIZE)
+        self.particles = ParticleSystem()
+        self.grenades_list = []
+        self.damage = DamageQueue()
         
+        self.heatmap = CoreHeatmap(self.map_size, (self.core_gx, self.core_gy), self.tile_cost)
         self.heatmap_dirty = True
         self.player = Player(self.core_gx + 2, self.core_gy + 2)
         self.camera = Camera(self.map_size * TILE_SIZE, self.map_size * TILE_SIZE)
         self.last_shot_time = 0
         self.core_under_attack_timer = 0
+        self.world_ready = True
 
     def trigger_overcharge(self):
-        duration = random.randint(15000, 25000)
-        self.overcharge_finish = pygame.time.get_ticks() + duration
+        duration = rng.randint(15000, 25000)
+        self.overcharge_finish = self.clock.get_ticks() + duration
 
     def generate_map(self):
-        self.walls = {}
-        for _ in range(self.map_size * self.map_size // 7):
-            gx, gy = random.randint(1, self.map_size-2), random.randint(1, self.map_size-2)
-            if abs(gx - self.core_gx) > 5 or abs(gy - self.core_gy) > 5:
-                self.walls[(gx, gy)] = True
-
-    def build_map_surface(self):
-        self.map_surface = pygame.Surface((self.map_size * TILE_SIZE, self.map_size * TILE_SIZE))
-        self.map_surface.fill(COLOR_BG)
-        for gy in range(self.map_size):
-            for gx in range(self.map_size):
-                r = pygame.Rect(gx*TILE_SIZE, gy*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                if (gx, gy) in self.walls:
-                    pygame.draw.rect(self.map_surface, COLOR_WALL, r)
-                else:
-                    pygame.draw.rect(self.map_surface, COLOR_FLOOR, r, 1)
+        # One draw from the game RNG seeds the map; layouts are cached on disk
+        # by seed and size and memory-mapped back (read-only)
+        self.map_seed = rng.getrandbits(32)
+        self.wall_mask = mapgen.load(self.map_seed, self.map_size, (self.core_gx, self.core_gy), self.map_cache)
+
+    def paint_terrain(self, surface, area, camera):
+        # Floor comes from floor_block blits and walls are filled over it, so a
+        # chunk is a few dozen calls rather than two fills per tile. The
+        # surface's clip keeps it all inside area.
+        surface.fill(COLOR_BG, camera.apply_rect(area))
+        x0, x1 = max(0, area.left // TILE_SIZE), min(self.map_size, (area.right - 1) // TILE_SIZE + 1)
+        y0, y1 = max(0, area.top // TILE_SIZE), min(self.map_size, (area.bottom - 1) // TILE_SIZE + 1)
+        if x0 >= x1 or y0 >= y1: return
+        ox, oy = camera.apply_rect(pygame.Rect(x0 * TILE_SIZE, y0 * TILE_SIZE, 0, 0)).topleft
+        for bx in range(0, x1 - x0, CHUNK_TILES):
+            for by in range(0, y1 - y0, CHUNK_TILES):
+                surface.blit(self.floor_block, (ox + bx * TILE_SIZE, oy + by * TILE_SIZE),
+                             (0, 0, (x1 - x0 - bx) * TILE_SIZE, (y1 - y0 - by) * TILE_SIZE))
+        for gx, gy in np.argwhere(self.wall_mask[x0:x1, y0:y1]).tolist():
+            surface.fill(COLOR_WALL, (ox + gx * TILE_SIZE, oy + gy * TILE_SIZE, TILE_SIZE, TILE_SIZE))
 
     def is_tile_blocked(self, gx, gy):
-        if (gx, gy) in self.walls: return True
-        for struct in list(self.spawners) + list(self.nodes) + list(self.player_walls) + list(self.cryo_nodes):
-            if int(struct.grid_pos.x) == gx and int(struct.grid_pos.y) == gy:
-                return True
-        return False
+        return self.occupancy.is_blocked(gx, gy)
 
     def is_position_safe_for_spawn(self, gx, gy):
         if self.is_tile_blocked(gx, gy): return False
@@ -127,50 +192,39 @@ class SystemGuardian:
         return True
 
     def get_player_wall_at(self, gx, gy):
-        for wall in self.player_walls:
-            if int(wall.grid_pos.x) == gx and int(wall.grid_pos.y) == gy:
-                return wall
-        return None
+        s = self.occupancy.get(gx, gy)
+        return s if isinstance(s, PlayerWall) else None
     
     def get_cryo_at(self, gx, gy):
-        for c in self.cryo_nodes:
-            if int(c.grid_pos.x) == gx and int(c.grid_pos.y) == gy:
-                return c
-        return None
+        s = self.occupancy.get(gx, gy)
+        return s if isinstance(s, CryoNode) else None
+
+    def tile_cost(self, gx, gy):
+        occupant = self.occupancy.get(gx, gy)
+        if occupant is WALL or isinstance(occupant, (EnemySpawner, EnergyNode)): return None
+
+        cost = 1
+        if isinstance(occupant, PlayerWall): cost = 30
+        if self.slow_field.is_slowed(gx, gy): cost += 5
+        return cost
+
+    def cost_grid(self):
+        cost = np.ones((self.map_size, self.map_size), dtype=np.int32)
+        for w in self.player_walls:
+            cost[int(w.grid_pos.x), int(w.grid_pos.y)] = 30
+        cost[self.slow_field.count > 0] += 5
+        cost[self.wall_mask] = INF
+        for s in list(self.spawners) + list(self.nodes):
+            cost[int(s.grid_pos.x), int(s.grid_pos.y)] = INF
+        return cost
 
     def update_heatmap(self):
-        target = (self.core_gx, self.core_gy)
-        pq = [(0, target)]
-        self.heatmap = {target: 0}
-        
-        while pq:
-            dist, curr = heapq.heappop(pq)
-            if dist > self.heatmap.get(curr, 9999): continue
-            
-            for dx, dy in [(1,0), (-1,0), (0,1), (0,-1)]:
-                nx, ny = curr[0] + dx, curr[1] + dy
-                
-                if 0 <= nx < self.map_size and 0 <= ny < self.map_size:
-                    is_structure_obstacle = False
-                    for s in list(self.spawners) + list(self.nodes):
-                        if int(s.grid_pos.x) == nx and int(s.grid_pos.y) == ny:
-                            is_structure_obstacle = True
-                            break
-
-                    if (nx, ny) not in self.walls and not is_structure_obstacle:
-                        
-                        cost = 1
-                        if self.get_player_wall_at(nx, ny): cost = 30
-                        
-                        for cryo in self.cryo_nodes:
-                            if abs(nx - cryo.grid_pos.x) + abs(ny - cryo.grid_pos.y) <= cryo.radius:
-                                cost += 5 
-                                break
-                        
-                        new_dist = dist + cost
-                        if new_dist < self.heatmap.get((nx, ny), 9999):
-                            self.heatmap[(nx, ny)] = new_dist
-                            heapq.heappush(pq, (new_dist, (nx, ny)))
+        changed = self.occupancy.pop_dirty()
+        if self.heatmap_dirty:
+            self.heatmap.rebuild(self.cost_grid())
+            self.heatmap_dirty = False
+        elif changed:
+            self.heatmap.update(changed)
 
     def start_intermission(self, is_new_checkpoint=False):
         self.state = "INTERMISSION"
@@ -190,7 +244,7 @@ class SystemGuardian:
             self.wave_type = "SURVIVAL"
             self.survival_time_left = 60000 
             self.max_enemies_cap = 60 
-            self.last_survival_spawn = pygame.time.get_ticks()
+            self.last_survival_spawn = self.clock.get_ticks()
             for _ in range(10): self._add_enemy(Enemy, {'speed': 400, 'hp': 50 + self.wave * 10, 'damage': 6})
         else:
             self.wave_type = "NORMAL"
@@ -206,29 +260,29 @@ class SystemGuardian:
         self._spawn_bonus() 
         if self.wave % 2 == 0: self._spawn_bonus()
         
-        if self.wave >= 4 and random.random() < 0.6 and len(self.spawners) < 2:
+        if self.wave >= 4 and rng.random() < 0.6 and len(self.spawners) < 2:
             self._spawn_structure(EnemySpawner, 18, 28)
-        if self.wave >= 3 and random.random() < 0.4 and len(self.nodes) < 1:
+        if self.wave >= 3 and rng.random() < 0.4 and len(self.nodes) < 1:
             self._spawn_structure(EnergyNode, 14, 24)
             
-        if random.random() < 0.5:
+        if rng.random() < 0.5:
             self._spawn_buff()
 
     def _add_enemy(self, cls, stats):
         if len(self.enemies) >= self.max_enemies_cap: return
         for _ in range(25):
-            gx, gy = random.randint(0, self.map_size-1), random.choice([0, self.map_size-1])
-            if random.random() > 0.5: gx, gy = random.choice([0, self.map_size-1]), random.randint(0, self.map_size-1)
+            gx, gy = rng.randint(0, self.map_size-1), rng.choice([0, self.map_size-1])
+            if rng.random() > 0.5: gx, gy = rng.choice([0, self.map_size-1]), rng.randint(0, self.map_size-1)
             if not self.is_tile_blocked(gx, gy):
                 self.enemies.add(cls(gx, gy, stats))
                 break
 
     def _spawn_bonus(self):
         for _ in range(60):
-            gx, gy = self.core_gx + random.randint(-8, 8), self.core_gy + random.randint(-8, 8)
+            gx, gy = self.core_gx + rng.randint(-8, 8), self.core_gy + rng.randint(-8, 8)
             if 0 <= gx < self.map_size and 0 <= gy < self.map_size:
                 if self.is_position_safe_for_spawn(gx, gy) and abs(gx-self.core_gx) > 2:
-                    rand = random.random()
+                    rand = rng.random()
                     if rand < 0.4: self.bonuses.add(BonusItem(gx, gy, "HEALTH"))
                     elif rand < 0.7: self.bonuses.add(BonusItem(gx, gy, "GRENADE_BOX"))
                     else: self.bonuses.add(BonusItem(gx, gy, "CORE_REPAIR"))
@@ -236,59 +290,100 @@ class SystemGuardian:
 
     def _spawn_special_crate(self):
         for _ in range(100):
-            gx = random.randint(5, self.map_size - 5)
-            gy = random.randint(5, self.map_size - 5)
+            gx = rng.randint(5, self.map_size - 5)
+            gy = rng.randint(5, self.map_size - 5)
             if self.is_position_safe_for_spawn(gx, gy) and abs(gx - self.core_gx) > 20:
                 self.bonuses.add(BonusItem(gx, gy, "WEAPON_CRATE"))
                 break
 
     def _spawn_buff(self):
         for _ in range(50):
-            gx = random.randint(10, self.map_size - 10)
-            gy = random.randint(10, self.map_size - 10)
+            gx = rng.randint(10, self.map_size - 10)
+            gy = rng.randint(10, self.map_size - 10)
             if self.is_position_safe_for_spawn(gx, gy) and abs(gx - self.core_gx) > 5:
-                b_type = random.choice(['BUFF_DMG', 'BUFF_DEF', 'BUFF_WALL'])
+                b_type = rng.choice(['BUFF_DMG', 'BUFF_DEF', 'BUFF_WALL'])
                 self.bonuses.add(BonusItem(gx, gy, b_type))
                 break
 
     def _spawn_structure(self, cls, min_d, max_d):
         for _ in range(150):
-            gx, gy = random.randint(5, self.map_size-6), random.randint(5, self.map_size-6)
+            gx, gy = rng.randint(5, self.map_size-6), rng.randint(5, self.map_size-6)
             dist = abs(gx - self.core_gx) + abs(gy - self.core_gy)
             if min_d <= dist <= max_d and not self.is_tile_blocked(gx, gy):
                 obj = cls(gx, gy)
                 if cls == EnemySpawner: self.spawners.add(obj)
                 else: self.nodes.add(obj)
-                self.update_heatmap()
                 break
 
+    def _snapshot_groups(self):
+        # Structure groups in a snapshot, with the per-structure fields saved.
+        # Times are stored as clock ticks and shifted to the clock on resume
+        return [(self.spawners, EnemySpawner, ('hp', 'last_spawn', 'scouts_produced')),
+                (self.nodes, EnergyNode, ('hp',)),
+                (self.player_walls, PlayerWall, ('hp', 'spawn_time')),
+                (self.cryo_nodes, CryoNode, ('hp', 'spawn_time'))]
+
     def save_game(self):
+        # Checkpoints happen between waves, so there are no enemies to save;
+        # shots and effects still in flight are dropped. The state is copied
+        # here and compressed and written by the background writer. Times are
+        # saved relative to the next tick, which is where a resume picks up.
+        if not self.save_file: return
+        self.update_heatmap()
+        rng_version, rng_state, rng_gauss = rng.getstate()
         data = {
+            "version": snapshot.VERSION,
+            "now": self.clock.get_ticks() + self.clock.step,
+            "map_size": self.map_size,
+            "map_seed": self.map_seed,
             "wave": self.wave,
+            "wave_type": self.wave_type,
             "money": self.money,
             "core_hp": self.core_hp,
-            "player_hp": self.player.hp,
-            "inventory": self.inventory,
-            "unlocked_weapons": self.unlocked_weapons,
-            "purchased_weapons": self.purchased_weapons,
+            "player": [int(self.player.grid_pos.x), int(self.player.grid_pos.y), self.player.hp],
+            "inventory": [dict(item) if item else None for item in self.inventory],
+            "selected_slot": self.selected_slot,
+            "unlocked_weapons": list(self.unlocked_weapons),
+            "purchased_weapons": list(self.purchased_weapons),
             "stats": {"dmg": self.stats_damage_dealt, "walls": self.stats_walls_built},
-            "buffs": {"dmg_mult": self.damage_multiplier, "core_def": self.core_defense_mod, "max_walls": self.max_walls_extra, "active_list": self.active_buffs}
+            "buffs": {"dmg_mult": self.damage_multiplier, "core_def": self.core_defense_mod, "max_walls": self.max_walls_extra, "active_list": list(self.active_buffs)},
+            "intermission_time_left": self.intermission_time_left,
+            "overcharge_finish": self.overcharge_finish,
+            "structures": {cls.__name__: [[int(e.grid_pos.x), int(e.grid_pos.y)] + [getattr(e, f) for f in fields] for e in group]
+                           for group, cls, fields in self._snapshot_groups()},
+            "bonuses": [[b.type, int(b.grid_pos.x), int(b.grid_pos.y)] for b in self.bonuses],
+            "rng": [rng_version, rng_gauss],
+        }
+        arrays = {
+            "walls": np.packbits(self.wall_mask),
+            "heatmap": self.heatmap.dist.copy(),
+            "rng_state": np.array(rng_state, dtype=np.uint32),
         }
-        with open(self.save_file, "w") as f:
-            json.dump(data, f)
+        self.snapshots.save(self.save_file, data, arrays)
         self.save_exists = True
 
     def load_game(self):
-        if not os.path.exists(self.save_file): return False
+        if not self.save_file or not self.save_exists: return False
         try:
-            with open(self.save_file, "r") as f:
-                data = json.load(f)
-            self.reset()
+            self.snapshots.wait()
+            data, arrays = self.input.read_snapshot(self.save_file)
+            shift = self.clock.get_ticks() - data["now"]
+
+            # Rebuild the saved map as is instead of generating a new one
+            self.map_size = data["map_size"]
+            self._reset_run()
+            self.map_seed = data["map_seed"]
+            self.wall_mask = np.unpackbits(arrays["walls"], count=self.map_size * self.map_size).reshape(self.map_size, self.map_size).astype(bool)
+            self._build_world()
+
             self.wave = data["wave"]
+            self.wave_type = data["wave_type"]
             self.money = data["money"]
             self.core_hp = data["core_hp"]
-            self.player.hp = data["player_hp"]
-            
+            gx, gy, hp = data["player"]
+            self.player = Player(gx, gy)
+            self.player.hp = hp
+
             loaded_inv = data["inventory"]
             for i in range(len(loaded_inv)):
                 item = loaded_inv[i]
@@ -296,17 +391,39 @@ class SystemGuardian:
                     if item.get('name') not in WEAPON_STATS:
                         loaded_inv[i] = {'type': 'WEAPON', 'name': 'PISTOL'} 
             self.inventory = loaded_inv
+            self.selected_slot = data["selected_slot"]
 
-            self.unlocked_weapons = data.get("unlocked_weapons", ['PISTOL'])
-            self.purchased_weapons = data.get("purchased_weapons", ['PISTOL'])
+            self.unlocked_weapons = data["unlocked_weapons"]
+            self.purchased_weapons = data["purchased_weapons"]
             self.stats_damage_dealt = data["stats"]["dmg"]
             self.stats_walls_built = data["stats"]["walls"]
             self.damage_multiplier = data["buffs"]["dmg_mult"]
             self.core_defense_mod = data["buffs"]["core_def"]
             self.max_walls_extra = data["buffs"]["max_walls"]
             self.active_buffs = data["buffs"]["active_list"]
-            
-            self.start_intermission(is_new_checkpoint=False)
+            self.overcharge_finish = data["overcharge_finish"] + shift
+
+            for group, cls, fields in self._snapshot_groups():
+                for gx, gy, *values in data["structures"][cls.__name__]:
+                    e = cls(gx, gy)
+                    for f, v in zip(fields, values):
+                        setattr(e, f, v + shift if f in ('last_spawn', 'spawn_time') else v)
+                    e._redraw()
+                    group.add(e)
+            for b_type, gx, gy in data["bonuses"]:
+                self.bonuses.add(BonusItem(gx, gy, b_type))
+
+            # The saved distances match the restored structures, so the
+            # heatmap only needs its step field rebuilt
+            self.heatmap.restore(self.cost_grid(), arrays["heatmap"])
+            self.occupancy.pop_dirty()
+            self.heatmap_dirty = False
+
+            rng_version, rng_gauss = data["rng"]
+            rng.setstate((rng_version, tuple(int(v) for v in arrays["rng_state"]), rng_gauss))
+
+            self.state = "INTERMISSION"
+            self.intermission_time_left = data["intermission_time_left"]
             return True
         except Exception as e:
             print(f"Save Load Error: {e}")
@@ -357,6 +474,7 @@ class SystemGuardian:
         return False
 
     def buy_item(self, category, item_id, cost, target_slot=None):
+        self.input.bought(category, item_id, target_slot)
         success = False
         
         if category == "WEAPONS":
@@ -393,7 +511,6 @@ class SystemGuardian:
                 if dist <= 3 and not self.is_tile_blocked(gx, gy) and (gx, gy) != (self.core_gx, self.core_gy):
                     wall = PlayerWall(gx, gy)
                     self.player_walls.add(wall)
-                    self.heatmap_dirty = True
                     selected_item['count'] -= 1
                     self.stats_walls_built += 1
                     if selected_item['count'] <= 0:
@@ -407,7 +524,6 @@ class SystemGuardian:
                 if dist <= 3 and not self.is_tile_blocked(gx, gy) and (gx, gy) != (self.core_gx, self.core_gy):
                     node = CryoNode(gx, gy)
                     self.cryo_nodes.add(node)
-                    self.heatmap_dirty = True
                     selected_item['count'] -= 1
                     if selected_item['count'] <= 0:
                         self.inventory[self.selected_slot] = None
@@ -421,32 +537,34 @@ class SystemGuardian:
             if selected_item['count'] <= 0:
                 self.inventory[self.selected_slot] = None
 
-    def shoot_weapon(self):
+    def shoot_weapon(self, target=None):
         item = self.inventory[self.selected_slot]
         if not item or item['type'] != 'WEAPON': return
         if item['name'] not in WEAPON_STATS: return 
 
         w_stats = WEAPON_STATS[item['name']]
-        now = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
         
         if now - self.last_shot_time > w_stats['rate']:
             self.last_shot_time = now
-            m_pos = pygame.mouse.get_pos()
-            wt = pygame.Vector2(m_pos[0] - self.camera.camera.x, m_pos[1] - self.camera.camera.y)
+            if target is None:
+                m_pos = self.input.mouse_pos
+                target = (m_pos[0] - self.camera.camera.x, m_pos[1] - self.camera.camera.y)
+            wt = pygame.Vector2(target)
             base_angle = math.atan2(wt.y - self.player.rect.centery, wt.x - self.player.rect.centerx)
             
             final_dmg = w_stats['damage'] * self.damage_multiplier
 
             for _ in range(w_stats['count']):
-                spread = random.uniform(-w_stats['spread'], w_stats['spread'])
+                spread = rng.uniform(-w_stats['spread'], w_stats['spread'])
                 angle = base_angle + spread
-                self.bullets.append(Bullet(
+                self.bullets.spawn(
                     self.player.rect.centerx, self.player.rect.centery, angle, 
                     damage=final_dmg, 
                     speed=w_stats['speed'],
                     max_dist=w_stats['range'],
                     color=w_stats['color']
-                ))
+                )
 
     def check_shop_proximity(self):
         core_pos = pygame.Vector2(self.core_gx * TILE_SIZE, self.core_gy * TILE_SIZE)
@@ -455,7 +573,7 @@ class SystemGuardian:
         return distance <= 200
 
     def draw_button(self, text, x, y, w, h, hover_color=COLOR_BUTTON_HOVER, default_color=COLOR_BUTTON, active=False, disabled=False):
-        mx, my = pygame.mouse.get_pos()
+        mx, my = self.input.mouse_pos
         rect = pygame.Rect(x, y, w, h)
         clicked = False
         color = default_color
@@ -464,23 +582,25 @@ class SystemGuardian:
         elif active: color = COLOR_TAB_ACTIVE
         elif rect.collidepoint(mx, my):
             color = hover_color
-            if pygame.mouse.get_pressed()[0] and not self.click_handled:
+            if self.input.mouse_down and not self.click_handled:
                 clicked = True
                 self.click_handled = True
 
         pygame.draw.rect(self.screen, color, rect, border_radius=8)
         pygame.draw.rect(self.screen, COLOR_UI_BORDER, rect, 2, border_radius=8)
-        text_surf = self.font.render(text, True, COLOR_BUTTON_TEXT)
+        text_surf = self.text_cache.render(text, 20, COLOR_BUTTON_TEXT)
         text_rect = text_surf.get_rect(center=rect.center)
         self.screen.blit(text_surf, text_rect)
         return clicked and not disabled
 
     def handle_input(self):
-        now = pygame.time.get_ticks()
-        if not pygame.mouse.get_pressed()[0]: self.click_handled = False
+        now = self.clock.get_ticks()
+        if not self.input.mouse_down: self.click_handled = False
 
-        for event in pygame.event.get():
+        for event in self.input.events:
             if event.type == pygame.QUIT: pygame.quit(); sys.exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.toggle(self)
             if event.type == pygame.KEYDOWN:
                 if self.state == "PLAYING" or self.state == "INTERMISSION":
                     if event.key == pygame.K_ESCAPE: 
@@ -502,7 +622,7 @@ class SystemGuardian:
                 elif self.state == "SHOP":
                     if event.key == pygame.K_ESCAPE or event.key == pygame.K_b: self.state = self.return_state
 
-        keys = pygame.key.get_pressed()
+        keys = self.input.keys
         if self.state in ["PLAYING", "INTERMISSION"]:
             if now - self.player.last_move_time > self.player.move_delay:
                 m = False
@@ -512,10 +632,10 @@ class SystemGuardian:
                 elif keys[pygame.K_d]: m = self.player.move_to(1, 0, self)
                 if m: self.player.last_move_time = now
             
-            if self.state == "PLAYING" and pygame.mouse.get_pressed()[0] and not self.click_handled:
+            if self.state == "PLAYING" and self.input.mouse_down and not self.click_handled:
                 selected = self.inventory[self.selected_slot]
                 if selected:
-                    m_pos = pygame.mouse.get_pos()
+                    m_pos = self.input.mouse_pos
                     if selected['type'] == 'WEAPON':
                         self.shoot_weapon()
                     elif selected['type'] == 'WALL':
@@ -531,54 +651,47 @@ class SystemGuardian:
                             self.last_shot_time = now
 
     def update_bullets(self):
-        for b in self.bullets[:]:
-            b.update(self.walls)
-            if not b.active: self.bullets.remove(b); continue
+        pool = self.bullets
+        pool.step(self.wall_mask)
+        core_rect = pygame.Rect(self.core_gx*TILE_SIZE, self.core_gy*TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        for b in pool.live():
+            rect = pool.rect(b)
             
             wall_hit = False
-            for w in list(self.player_walls) + list(self.cryo_nodes):
-                if w.rect.colliderect(b.rect): 
-                    w.hp -= 25 
+            for w in self.occupancy.structures_in(rect):
+                if isinstance(w, (PlayerWall, CryoNode)): 
+                    self.damage.hit(w, 25)
                     wall_hit = True
                     break 
             if wall_hit:
-                self.bullets.remove(b)
+                pool.kill(b)
                 continue
 
-            if b.is_enemy:
-                if self.player.rect.colliderect(b.rect): self.player.hp -= 10; self.bullets.remove(b)
-                elif pygame.Rect(self.core_gx*TILE_SIZE, self.core_gy*TILE_SIZE, TILE_SIZE, TILE_SIZE).colliderect(b.rect):
-                    self.core_hp -= 7 * self.core_defense_mod; self.bullets.remove(b); self.core_under_attack_timer = pygame.time.get_ticks() + 1000
+            if pool.is_enemy[b]:
+                if self.player.rect.colliderect(rect): self.damage.hit(self.player, 10); pool.kill(b)
+                elif core_rect.colliderect(rect): self.damage.hit_core(7 * self.core_defense_mod); pool.kill(b)
             else:
-                h = False
-                for e in list(self.enemies) + list(self.spawners) + list(self.nodes):
-                    if e.rect.colliderect(b.rect):
-                        actual_dmg = min(e.hp, b.damage)
-                        e.hp -= actual_dmg
-                        self.stats_damage_dealt += actual_dmg
-                        h = True
-                        if e.hp <= 0:
-                            if hasattr(e, 'reward'): self.money += e.reward
-                            if not isinstance(e, EnergyNode): e.kill()
-                            if isinstance(e, (EnemySpawner, EnergyNode)): self.heatmap_dirty = True
-                        break
-                if h: self.bullets.remove(b)
+                # Targets already killed this tick don't stop bullets
+                targets = ([e for e in self.enemies.query(rect) if self.damage.remaining(e) > 0] or
+                           [s for s in self.occupancy.structures_in(rect) if isinstance(s, (EnemySpawner, EnergyNode)) and self.damage.remaining(s) > 0])
+                if targets:
+                    self.damage.hit(targets[0], float(pool.damage[b]), credit=True)
+                    pool.kill(b)
 
     def update(self):
         self.dt = self.clock.get_time()
-        self.now = pygame.time.get_ticks()
+        self.now = self.clock.get_ticks()
+        if not self.world_ready: return
 
         self.process_bonuses()
         self.process_grenades()
         self.update_structures()
+        self.update_bullets()
 
-        if self.heatmap_dirty:
-            self.update_heatmap()
-            self.heatmap_dirty = False
+        self.resolve_damage()
+        self.update_heatmap()
 
-        self.update_bullets()
-        if self.settings_particles:
-            self.particles = [p for p in self.particles if p.update()]
+        self.update_particles()
 
         if self.state == "INTERMISSION":
             self.update_intermission()
@@ -600,6 +713,10 @@ class SystemGuardian:
         if self.player.hp <= 0 or self.core_hp <= 0:
             self.state = "GAMEOVER"
 
+    def update_particles(self):
+        if self.settings_particles:
+            self.particles.update()
+
     def update_intermission(self):
         self.intermission_time_left -= self.dt
         if self.intermission_time_left <= 0:
@@ -615,7 +732,7 @@ class SystemGuardian:
                 if b.type == "WEAPON_CRATE":
                     remaining = [w for w in WEAPON_STATS.keys() if w not in self.unlocked_weapons]
                     if remaining:
-                        new_w = random.choice(remaining)
+                        new_w = rng.choice(remaining)
                         self.unlocked_weapons.append(new_w)
                         print(f"Unlocked: {new_w}")
                 elif b.type.startswith("BUFF"):
@@ -640,32 +757,37 @@ class SystemGuardian:
         for g in self.grenades_list[:]:
             if g.update():
                 if self.settings_particles:
-                    for _ in range(20):
-                        self.particles.append(Particle(g.pos.x, g.pos.y, COLOR_EXPLOSION, speed_mult=2.5, decay_speed=15))
+                    self.particles.emit(g.pos.x, g.pos.y, COLOR_EXPLOSION, count=20, speed_mult=2.5, decay_speed=15)
                 blast_rect = pygame.Rect(g.pos.x - g.blast_radius, g.pos.y - g.blast_radius, g.blast_radius*2, g.blast_radius*2)
-                for e in list(self.enemies):
-                    if e.rect.colliderect(blast_rect):
-                        if g.pos.distance_to(pygame.Vector2(e.rect.center)) <= g.blast_radius:
-                            dmg = min(e.hp, g.damage * self.damage_multiplier)
-                            e.hp -= dmg
-                            self.stats_damage_dealt += dmg
-                            if e.hp <= 0: 
-                                self.money += e.reward
-                                e.kill()
-                for s in list(self.spawners):
-                    if s.rect.colliderect(blast_rect):
-                        s.hp -= g.damage * self.damage_multiplier
-                        if s.hp <= 0: 
-                            self.money += s.reward
-                            s.kill()
-                            self.update_heatmap()
+                for e in self.enemies.query(blast_rect):
+                    if g.pos.distance_to(pygame.Vector2(e.rect.center)) <= g.blast_radius:
+                        self.damage.hit(e, g.damage * self.damage_multiplier, credit=True)
+                for s in self.occupancy.structures_in(blast_rect):
+                    if isinstance(s, EnemySpawner):
+                        self.damage.hit(s, g.damage * self.damage_multiplier)
                 self.grenades_list.remove(g)
 
+    def resolve_damage(self):
+        # Applies everything hit since the last pass at once: a target dies at
+        # most once, rewards and stats are added up, and structures that go
+        # only mark their tiles dirty, so the heatmap repairs them all in the
+        # one update_heatmap that follows
+        hits, core, dealt = self.damage.take()
+        self.stats_damage_dealt += dealt
+        if core is not None:
+            self.core_hp -= core
+            self.core_under_attack_timer = self.now + 1000
+        for target, amount in hits.items():
+            target.hp -= amount
+            if target.hp > 0 or target is self.player or not target.alive(): continue
+            self.money += getattr(target, 'reward', 0)
+            target.kill()
+            if isinstance(target, EnergyNode): self.trigger_overcharge()
+
     def update_structures(self):
         for w in list(self.player_walls) + list(self.cryo_nodes):
-            if self.now - w.spawn_time > w.lifetime or w.hp <= 0:
+            if self.now - w.spawn_time > w.lifetime:
                 w.kill()
-                self.heatmap_dirty = True
 
     def update_waves(self):
         if self.wave_type == "SURVIVAL":
@@ -688,45 +810,33 @@ class SystemGuardian:
                         s.scouts_produced += 1
                         s.last_spawn = self.now
                         s._redraw()
-                if s.hp <= 0:
-                    s.kill()
-                    self.money += s.reward
-                    self.heatmap_dirty = True
             
             if len(self.enemies) == 0 and len(self.spawners) == 0:
                 self.start_intermission(is_new_checkpoint=True)
                 return
 
     def update_enemies_logic(self):
-        for n in list(self.energy_nodes):
-            if n.hp <= 0:
-                n.kill()
-                self.money += n.reward
-                self.heatmap_dirty = True
-                self.trigger_overcharge()
-
         is_overcharged = self.now < self.overcharge_finish
-        core_mod = 0.5 if len(self.energy_nodes) > 0 else 1.0
+        core_mod = 0.5 if len(self.nodes) > 0 else 1.0
         if is_overcharged: core_mod = 0
         core_mod *= self.core_defense_mod 
-        
-        for e in self.enemies:
-            e.ai_logic(self.player.grid_pos.x, self.player.grid_pos.y, self.heatmap, self)
-            e.update_animation()
-            if isinstance(e, ShooterEnemy):
-                eb = e.try_shoot(pygame.Vector2(self.player.rect.center))
-                if eb: self.bullets.append(eb)
-            
-            if e.grid_pos == pygame.Vector2(self.core_gx, self.core_gy):
-                self.core_hp -= e.damage * core_mod
-                self.core_under_attack_timer = self.now + 1000
-            elif e.grid_pos == self.player.grid_pos:
-                self.player.hp -= 0.5
+
+        pgx, pgy = int(self.player.grid_pos.x), int(self.player.grid_pos.y)
+        self.visibility.update(pgx, pgy)
+        self.enemy_store.update(self, self.now)
+
+        core_hits, player_hits = self.enemy_store.contacts((self.core_gx, self.core_gy), (pgx, pgy))
+        for damage in core_hits: self.damage.hit_core(damage * core_mod)
+        if player_hits: self.damage.hit(self.player, 0.5 * player_hits)
 
     def draw(self):
-        self.screen.fill(COLOR_BG)
+        in_game = self.state in ["PLAYING", "PAUSED", "SHOP", "GAMEOVER", "INTERMISSION"]
+        # Structure layer chunks cover the whole view unless the map is smaller
+        # than the screen, so in game the background fill is usually wasted
+        if not in_game or not self.world_covers_screen: self.screen.fill(COLOR_BG)
+        if self.state not in ["PLAYING", "INTERMISSION"] or self.profiler.enabled: self.dirty.invalidate()
         
-        if self.state in ["PLAYING", "PAUSED", "SHOP", "GAMEOVER", "INTERMISSION"]:
+        if in_game:
             self._draw_game()
 
         if self.state == "MAIN_MENU": self.draw_main_menu()
@@ -736,53 +846,113 @@ class SystemGuardian:
         elif self.state == "GAMEOVER": self._draw_overlay_bg(); self.draw_gameover()
         if self.state == "INTERMISSION": self.draw_intermission_hud()
             
-        if self.show_fps: self.draw_text(f"FPS: {int(self.clock.get_fps())}", 16, 40, 10, COLOR_MONEY)
-        pygame.display.flip()
+        if self.show_fps: self.dirty.add(self.draw_text(f"FPS: {int(self.frame_clock.get_fps())}", 16, 40, 10, COLOR_MONEY))
+        if self.profiler.enabled: self.draw_profiler()
+        self.dirty.present((self.state, self.camera.camera.topleft, self._hud_key()) if self.world_ready else None)
+
+    def _hud_key(self):
+        # Everything the HUD and intermission text depend on
+        now = self.clock.get_ticks()
+        inventory = tuple((i['type'], i.get('name'), i.get('count')) if i else None for i in self.inventory)
+        return (int(self.core_hp), int(self.player.hp), self.wave, self.money, tuple(self.active_buffs),
+                inventory, self.selected_slot, now < self.overcharge_finish, now < self.core_under_attack_timer and (now // 200) % 2,
+                self.state in ["PLAYING", "INTERMISSION"] and self.check_shop_proximity(),
+                int(self.survival_time_left / 1000) if self.wave_type == "SURVIVAL" else None,
+                int(self.intermission_time_left / 1000) if self.state == "INTERMISSION" else None)
+
+    def draw_profiler(self):
+        # Text only refreshes every half second so the overlay stays readable and cheap
+        if self.profiler.frames % 30 == 0 or not self.profiler_lines:
+            self.profiler_lines = [(label, f"{s['avg_ms']:.2f}", f"{s['max_ms']:.2f}") for label, s in self.profiler.stats().items()]
+        lines = [("PHASE MS", "AVG", "MAX")] + self.profiler_lines
+        panel = pygame.Surface((250, 16 * len(lines) + 10), pygame.SRCALPHA)
+        panel.fill(COLOR_OVERLAY)
+        self.screen.blit(panel, (10, 70))
+        for i, (label, avg, peak) in enumerate(lines):
+            y = 75 + i * 16
+            self.screen.blit(self.text_cache.render(label, 14, COLOR_MONEY), (18, y))
+            for text, right in ((avg, 190), (peak, 250)):
+                img = self.text_cache.render(text, 14, COLOR_MONEY)
+                self.screen.blit(img, img.get_rect(topright=(right, y)))
 
     def _draw_game(self):
-        self.screen.blit(self.map_surface, self.camera.camera)
-        
-        cr = self.camera.camera
-        now = pygame.time.get_ticks()
-        is_overcharged = now < self.overcharge_finish
-        
+        self._draw_world()
+        self._draw_hud()
+
+    def _structure_items(self, is_overcharged):
+        # Paint order of the structure layer: core, cryo ranges, then structures
         core_r = pygame.Rect(self.core_gx * TILE_SIZE, self.core_gy * TILE_SIZE, TILE_SIZE, TILE_SIZE)
         core_color = COLOR_CORE if not is_overcharged else COLOR_OVERCHARGE
-        pygame.draw.rect(self.screen, core_color, self.camera.apply_rect(core_r), border_radius=10)
-        
+        items = [(('core', is_overcharged), core_r, lambda s, cam: pygame.draw.rect(s, core_color, cam.apply_rect(core_r), border_radius=10))]
         for c in self.cryo_nodes:
-            c.draw_range(self.screen, self.camera)
-
-        for g in [self.spawners, self.nodes, self.cryo_nodes, self.player_walls, self.enemies, self.bonuses]:
+            r = (c.radius * TILE_SIZE) + (TILE_SIZE // 2)
+            items.append(((c, 'range'), pygame.Rect(c.rect.centerx - r, c.rect.centery - r, r * 2, r * 2),
+                          lambda s, cam, c=c: c.draw_range(s, cam)))
+        for g in [self.spawners, self.nodes, self.cryo_nodes, self.player_walls]:
             for e in g:
-                self.screen.blit(e.image, self.camera.apply(e))
-                if hasattr(e, 'draw_hp_bar'): e.draw_hp_bar(self.screen, self.camera)
+                items.append(((e, e.image), e.rect, lambda s, cam, e=e: s.blit(e.image, cam.apply(e))))
+        return items
+
+    def _sync_structure_layer(self, is_overcharged):
+        key = (self.occupancy.version, is_overcharged, tuple(s.image for s in self.spawners))
+        if key == self.structure_layer_key: return
+        self.structure_layer_key = key
+        if self.structure_layer.sync(self._structure_items(is_overcharged)):
+            self.dirty.invalidate()
+
+    def _draw_world(self):
+        # Only what intersects the view is drawn; the margin keeps hp bars above
+        # sprites just off the top edge
+        now = self.clock.get_ticks()
+        self._sync_structure_layer(now < self.overcharge_finish)
+        player_rect = self.player.render_rect(self.alpha)
+        self.camera.follow(player_rect)
+        view = self.camera.view_rect()
+        self.structure_layer.draw(self.screen, view)
+        visible = self.camera.view_rect(TILE_SIZE)
+
+        # Structure counts are capped, a rect test is cheaper than a grid walk
+        for g in [self.spawners, self.nodes, self.cryo_nodes, self.player_walls]:
+            for e in g:
+                if e.hp < e.max_hp and e.rect.colliderect(visible):
+                    e.draw_hp_bar(self.screen, self.camera)
+                    self.dirty.add(self.camera.apply(e).inflate(0, 20))
+        for e in self.enemies.query(visible):
+            r = e.render_rect(self.alpha)
+            self.dirty.add(self.screen.blit(e.image, self.camera.apply_rect(r)).inflate(0, 20))
+            e.draw_hp_bar(self.screen, self.camera, r)
+        for e in self.bonuses:
+            if e.rect.colliderect(visible):
+                self.dirty.add(self.screen.blit(e.image, self.camera.apply(e)))
 
         for g in self.grenades_list:
             pos = self.camera.apply_rect(pygame.Rect(g.pos.x-4, g.pos.y-4, 8, 8))
-            pygame.draw.circle(self.screen, COLOR_GRENADE, pos.center, 5)
+            self.dirty.add(pygame.draw.circle(self.screen, COLOR_GRENADE, pos.center, 5))
 
-        self.screen.blit(self.player.image, self.camera.apply(self.player))
-        for b in self.bullets:
-            pygame.draw.circle(self.screen, b.color, self.camera.apply_rect(b.rect).center, 3)
+        self.dirty.add(self.screen.blit(self.player.image, self.camera.apply_rect(player_rect)))
+        for r in self.bullets.draw(self.screen, self.camera, self.alpha): self.dirty.add(r)
         
-        for p in self.particles: p.draw(self.screen, self.camera)
+        r = self.particles.draw(self.screen, self.camera)
+        if r: self.dirty.add(r)
 
         cur_item = self.inventory[self.selected_slot]
         if self.state == "PLAYING" and cur_item:
-            mx, my = pygame.mouse.get_pos()
+            mx, my = self.input.mouse_pos
             if cur_item['type'] == 'GRENADE':
                 player_screen_pos = self.camera.apply_rect(self.player.rect).center
-                pygame.draw.circle(self.screen, COLOR_GRENADE_RANGE, player_screen_pos, 300, 1)
+                self.dirty.add(pygame.draw.circle(self.screen, COLOR_GRENADE_RANGE, player_screen_pos, 300, 1))
                 m_vec = pygame.Vector2(mx, my)
                 p_vec = pygame.Vector2(player_screen_pos)
                 dist_vec = m_vec - p_vec
                 if dist_vec.length() > 300: m_vec = p_vec + dist_vec.normalize() * 300
-                pygame.draw.circle(self.screen, COLOR_GRENADE_PREVIEW, (int(m_vec.x), int(m_vec.y)), 160, 1)
+                self.dirty.add(pygame.draw.circle(self.screen, COLOR_GRENADE_PREVIEW, (int(m_vec.x), int(m_vec.y)), 160, 1))
             elif cur_item['type'] == 'CRYO':
                  gx, gy = int((mx-self.camera.camera.x)//TILE_SIZE), int((my-self.camera.camera.y)//TILE_SIZE)
                  center = self.camera.apply_rect(pygame.Rect(gx*TILE_SIZE, gy*TILE_SIZE, TILE_SIZE, TILE_SIZE)).center
-                 pygame.draw.circle(self.screen, COLOR_CRYO_ZONE, center, (2 * TILE_SIZE) + (TILE_SIZE // 2), 2)
+                 self.dirty.add(pygame.draw.circle(self.screen, COLOR_CRYO_ZONE, center, (2 * TILE_SIZE) + (TILE_SIZE // 2), 2))
+
+    def _draw_hud(self):
+        now = self.clock.get_ticks()
 
         if self.state in ["PLAYING", "INTERMISSION"] and self.check_shop_proximity():
             self.draw_text("PRESS [B] FOR SHOP", 20, SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 100, (255, 255, 0))
@@ -860,7 +1030,9 @@ class SystemGuardian:
         if self.draw_button(fps_text, cx, cy, bw, bh): self.show_fps = not self.show_fps
         part_text = f"PARTICLES: {'ON' if self.settings_particles else 'OFF'}"
         if self.draw_button(part_text, cx, cy + spacing, bw, bh): self.settings_particles = not self.settings_particles
-        if self.draw_button("BACK", cx, cy + spacing * 2, bw, bh): self.state = self.prev_state
+        prof_text = f"PROFILER [F3]: {'ON' if self.profiler.enabled else 'OFF'}"
+        if self.draw_button(prof_text, cx, cy + spacing * 2, bw, bh): self.profiler.toggle(self)
+        if self.draw_button("BACK", cx, cy + spacing * 3, bw, bh): self.state = self.prev_state
 
     def draw_gameover(self):
         self.draw_text("CORE BREACHED", 60, SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 140, COLOR_ENEMY)
@@ -885,7 +1057,7 @@ class SystemGuardian:
             self.state = "MAIN_MENU"
 
     def draw_ui(self):
-        now = pygame.time.get_ticks()
+        now = self.clock.get_ticks()
         is_overcharged = now < self.overcharge_finish
         
         pygame.draw.rect(self.screen, COLOR_BAR_BG, (20, 20, 260, 22))
@@ -1037,16 +1209,46 @@ class SystemGuardian:
         self.draw_text("PRESS [B] OR [ESC] TO CLOSE", 16, SCREEN_WIDTH//2, panel_y + panel_h + 20, (150, 150, 150))
 
     def draw_text(self, text, size, x, y, color=COLOR_TEXT):
-        f = pygame.font.SysFont("Consolas", size, bold=True)
-        img = f.render(str(text), True, color)
-        self.screen.blit(img, img.get_rect(center=(x, y)))
+        img = self.text_cache.render(str(text), size, color)
+        return self.screen.blit(img, img.get_rect(center=(x, y)))
+
+    def step(self, ticks=1):
+        for _ in range(ticks):
+            self.update()
+            if self.profiler.enabled: self.profiler.end_frame()
+            self.clock.tick()
 
     def run(self):
+        # Fixed-step loop: real time accumulates and is spent in whole clock
+        # steps, at most MAX_CATCHUP_STEPS per frame so a slow frame can't
+        # snowball; the leftover fraction of a step interpolates the render
+        lag = 0
         while True:
+            lag += self.input.poll(self.frame_clock)
+            self.startup.mark("frame pacing")
             self.handle_input()
-            self.update()
+            steps = 0
+            while lag >= self.clock.step and steps < MAX_CATCHUP_STEPS:
+                self.update()
+                self.clock.tick()
+                lag -= self.clock.step
+                steps += 1
+            if lag >= self.clock.step: lag = 0
+            self.alpha = lag / self.clock.step
             self.draw()
-            self.clock.tick(FPS)
+            self.startup.first_frame()
+            if self.profiler.enabled: self.profiler.end_frame()
 
 if __name__ == "__main__":
-    SystemGuardian().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="System Guardian")
+    parser.add_argument("--record", metavar="LOG", help="record this session's input for replay.py")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible session (recordings pick one if not given)")
+    parser.add_argument("--startup-profile", action="store_true", help="print how long each startup phase took")
+    args = parser.parse_args()
+    startup = StartupProfile(STARTED, echo=args.startup_profile)
+    startup.mark("imports")
+    seed, recorder = args.seed, None
+    if args.record:
+        seed = seed if seed is not None else int.from_bytes(os.urandom(4), "little")
+        recorder = InputRecorder(args.record, seed, MAP_SIZE, os.path.exists(SAVE_FILE))
+    SystemGuardian(seed=seed, input_source=recorder, defer_world=True, startup=startup).run()
\ No newline at end of file
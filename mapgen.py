@@ -0,0 +1,48 @@
+import os
+import numpy as np
+
+# Wall layouts come from a per-map seed. A (seed, size) pair always gives the
+# same layout, so layouts can be cached on disk and memory-mapped back.
+VERSION = 1
+
+def generate(seed, size, core, clearance=5):
+    # size*size//7 random picks inside the border, dropping any within
+    # clearance of the core; repeated picks collapse into one wall
+    gen = np.random.default_rng(seed)
+    n = size * size // 7
+    xs, ys = gen.integers(1, size - 1, n), gen.integers(1, size - 1, n)
+    keep = (np.abs(xs - core[0]) > clearance) | (np.abs(ys - core[1]) > clearance)
+    mask = np.zeros((size, size), dtype=bool)
+    mask[xs[keep], ys[keep]] = True
+    return mask
+
+def load(seed, size, core, cache_dir=None, max_files=32):
+    # Read-only wall mask indexed [gx, gy], from the cache when it's there.
+    # The cache keeps the max_files most recently used layouts.
+    if not cache_dir: return generate(seed, size, core)
+    path = os.path.join(cache_dir, f"walls_v{VERSION}_{size}_{seed:08x}.npy")
+    try:
+        mask = np.load(path, mmap_mode='r')
+        os.utime(path)
+        return mask
+    except (OSError, ValueError):
+        pass
+    mask = generate(seed, size, core)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, mask)
+        os.replace(tmp, path)
+        _prune(cache_dir, max_files)
+    except OSError:
+        pass
+    return mask
+
+def _prune(cache_dir, max_files):
+    files = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if f.endswith(".npy")]
+    if len(files) <= max_files: return
+    files.sort(key=os.path.getmtime)
+    for path in files[:-max_files]:
+        try: os.remove(path)
+        except OSError: pass
@@ -0,0 +1,187 @@
+import heapq
+import numpy as np
+
+INF = 9999
+# Step codes for the flow field; 0 means "no downhill neighbour". Order matches the
+# neighbour probe order enemies have always used, so ties resolve the same way.
+STEPS = [(0, 0), (0, 1), (0, -1), (1, 0), (-1, 0)]
+STEP_DX = np.array([s[0] for s in STEPS], dtype=np.int8)
+STEP_DY = np.array([s[1] for s in STEPS], dtype=np.int8)
+# Cost of a sweep in repaired tiles: a pass costs about as much as repairing
+# 2 tiles in update(), and every tile the sweep settles about 1/80 of one.
+# Repairs give up at half of that: a finished repair costs under half a sweep
+# and one that gives up adds little to the sweep it falls back to.
+PASS_TILES = 2
+SETTLED_PER_TILE = 80
+
+class CoreHeatmap:
+    # Distance from every tile to the core plus a per-tile "next step" field.
+    # Arrays are indexed [gx, gy] and padded by one blocked tile on each side so
+    # neighbour lookups never leave the array. tile_cost(gx, gy) returns the cost
+    # of entering a tile, or None if it can't be entered. update() repairs only
+    # the region affected by changed tiles and gives the same result as rebuild().
+    def __init__(self, size, target, tile_cost):
+        self.size = size
+        self.target = target
+        self.tile_cost = tile_cost
+        self.stride = size + 2
+        self._cost = np.full((size + 2, size + 2), INF, dtype=np.int32)
+        self._dist = np.full((size + 2, size + 2), INF, dtype=np.int32)
+        self.cost = self._cost[1:-1, 1:-1]
+        self.dist = self._dist[1:-1, 1:-1]
+        self.step = np.zeros((size, size), dtype=np.int8)
+        self._offsets = (self.stride, -self.stride, 1, -1)
+        self._neighbours = np.array(self._offsets)
+        self._target = (target[0] + 1) * self.stride + target[1] + 1
+        self.repair_limit = size * size
+
+    def dist_at(self, gx, gy):
+        return int(self.dist[gx, gy])
+
+    def step_at(self, gx, gy):
+        return STEPS[self.step[gx, gy]]
+
+    def steps_at(self, xs, ys):
+        codes = self.step[xs, ys]
+        return STEP_DX[codes], STEP_DY[codes]
+
+    def rebuild(self, cost):
+        self.cost[...] = np.minimum(cost, INF)
+        self._restart()
+
+    def restore(self, cost, dist):
+        # Adopts distances saved for this same cost grid; only the step field
+        # is recomputed, which is a handful of vectorised passes
+        self.cost[...] = np.minimum(cost, INF)
+        self.dist[...] = dist
+        self._update_steps(0, self.size, 0, self.size)
+        # No sweep ran; sweeps on these maps take about one pass per row
+        self._set_repair_limit(self.size, int((self.dist < INF).sum()))
+
+    def _sweep(self, active):
+        # Vectorised Bellman-Ford from the current (upper bound) distances that
+        # only relaxes around the flat indices in active, i.e. the tiles that
+        # improved in the previous pass. Work follows the tiles settled rather
+        # than passes x map area.
+        dist, cost = self._dist.ravel(), self._cost.ravel()
+        passes = settled = 0
+        while active.size:
+            passes += 1
+            settled += active.size
+            nb = (active[:, None] + self._neighbours).ravel()
+            nd = np.repeat(dist[active], len(self._offsets)) + cost[nb]
+            better = nd < dist[nb]
+            nb, nd = nb[better], nd[better]
+            # Keep the lowest offer for tiles reached from several sides
+            order = np.lexsort((nd, nb))
+            nb, nd = nb[order], nd[order]
+            first = np.empty(nb.size, dtype=bool)
+            first[:1] = True
+            np.not_equal(nb[1:], nb[:-1], out=first[1:])
+            active = nb[first]
+            dist[active] = nd[first]
+        self._update_steps(0, self.size, 0, self.size)
+        self._set_repair_limit(passes, settled)
+
+    def _set_repair_limit(self, passes, settled):
+        self.repair_limit = max(1, (passes * PASS_TILES + settled // SETTLED_PER_TILE) // 2)
+
+    def _restart(self):
+        # Costs are already updated; sweep again from scratch
+        self._dist.fill(INF)
+        self._dist.flat[self._target] = 0
+        self._sweep(np.array([self._target]))
+
+    def update(self, tiles):
+        dist, cost = self._dist.ravel(), self._cost.ravel()
+        stride = self.stride
+        target = self._target
+        old_costs = {}
+        increased, decreased = [], []
+        for gx, gy in tiles:
+            if not (0 <= gx < self.size and 0 <= gy < self.size): continue
+            i = (gx + 1) * stride + gy + 1
+            if i == target: continue
+            new = self.tile_cost(gx, gy)
+            new = INF if new is None else new
+            old = int(cost[i])
+            if old == new: continue
+            old_costs[i] = old
+            cost[i] = new
+            if new > old: increased.append(i)
+            else: decreased.append(i)
+        if not old_costs: return
+
+        # Everything whose shortest path may run through a tile that got more
+        # expensive is dropped and rebuilt from the untouched frontier. Once
+        # that region outgrows repair_limit a fresh sweep is cheaper, so the
+        # walk stops there.
+        limit = self.repair_limit
+        stack = [i for i in increased if dist[i] < INF]
+        invalid = set(stack)
+        while stack:
+            if len(invalid) > limit:
+                self._restart()
+                return
+            curr = stack.pop()
+            d = int(dist[curr])
+            for off in self._offsets:
+                n = curr + off
+                if n in invalid or n == target or dist[n] >= INF: continue
+                c = old_costs[n] if n in old_costs else int(cost[n])
+                if dist[n] == d + c:
+                    invalid.add(n)
+                    stack.append(n)
+        for i in invalid: dist[i] = INF
+
+        touched = set(invalid)
+        touched.update(old_costs)
+        pq = []
+        for i in list(invalid) + decreased:
+            c = int(cost[i])
+            if c >= INF: continue
+            best = min(int(dist[i + off]) for off in self._offsets) + c
+            if best < dist[i]:
+                dist[i] = best
+                pq.append((best, i))
+        heapq.heapify(pq)
+        if not self._propagate(pq, touched, limit):
+            # Distances are all upper bounds at this point, so the sweep can
+            # continue from them
+            self._sweep(np.flatnonzero(self._dist.ravel() < INF))
+            return
+
+        xs = [i // stride - 1 for i in touched]
+        ys = [i % stride - 1 for i in touched]
+        self._update_steps(min(xs) - 1, max(xs) + 2, min(ys) - 1, max(ys) + 2)
+
+    def _propagate(self, pq, touched, limit):
+        # False if it gave up after touching more than limit tiles
+        dist, cost = self._dist.ravel(), self._cost.ravel()
+        while pq:
+            d, curr = heapq.heappop(pq)
+            if d > dist[curr]: continue
+            touched.add(curr)
+            if len(touched) > limit: return False
+
+            for off in self._offsets:
+                n = curr + off
+                new_dist = d + int(cost[n])
+                if new_dist < dist[n]:
+                    dist[n] = new_dist
+                    heapq.heappush(pq, (new_dist, n))
+        return True
+
+    def _update_steps(self, x0, x1, y0, y1):
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.size, x1), min(self.size, y1)
+        if x0 >= x1 or y0 >= y1: return
+        d = self._dist
+        curr = d[x0 + 1:x1 + 1, y0 + 1:y1 + 1]
+        step = self.step[x0:x1, y0:y1]
+        step.fill(0)
+        # Assign in reverse so the first downhill neighbour in probe order wins
+        for code in range(len(STEPS) - 1, 0, -1):
+            dx, dy = STEPS[code]
+            neighbour = d[x0 + 1 + dx:x1 + 1 + dx, y0 + 1 + dy:y1 + 1 + dy]
+            step[neighbour < curr] = code
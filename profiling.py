@@ -0,0 +1,116 @@
+import time
+from collections import deque
+
+# (label, SystemGuardian method) for every timed phase, in frame order
+PHASES = [
+    ('input', 'handle_input'),
+    ('bonuses', 'process_bonuses'),
+    ('grenades', 'process_grenades'),
+    ('structures', 'update_structures'),
+    ('bullets', 'update_bullets'),
+    ('damage', 'resolve_damage'),
+    ('heatmap', 'update_heatmap'),
+    ('particles', 'update_particles'),
+    ('waves', 'update_waves'),
+    ('enemy_ai', 'update_enemies_logic'),
+    ('world_render', '_draw_world'),
+    ('hud_render', '_draw_hud'),
+]
+
+class FrameProfiler:
+    # Per-phase frame timings. While enabled, the phase methods on the game
+    # instance are shadowed by timing wrappers; disabling removes them again,
+    # so a disabled profiler adds no work to the frame at all.
+    def __init__(self, window=120):
+        self.window = window
+        self.enabled = False
+        self.current = {}
+        self.history = {label: deque(maxlen=window) for label, _ in PHASES}
+        self.frames = 0
+
+    def enable(self, game):
+        if self.enabled: return
+        for label, name in PHASES:
+            setattr(game, name, self._timed(label, getattr(game, name)))
+        self.enabled = True
+
+    def disable(self, game):
+        if not self.enabled: return
+        for _, name in PHASES:
+            game.__dict__.pop(name, None)
+        self.enabled = False
+        self.current.clear()
+
+    def toggle(self, game):
+        if self.enabled: self.disable(game)
+        else: self.enable(game)
+
+    def _timed(self, label, fn):
+        current = self.current
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                current[label] = current.get(label, 0.0) + time.perf_counter() - start
+        return timed
+
+    def end_frame(self):
+        for label, samples in self.history.items():
+            samples.append(self.current.get(label, 0.0) * 1000)
+        self.current.clear()
+        self.frames += 1
+
+    def stats(self):
+        # {phase: {'avg_ms': ..., 'max_ms': ...}} over the rolling window
+        result = {}
+        for label, samples in self.history.items():
+            if samples:
+                result[label] = {'avg_ms': sum(samples) / len(samples), 'max_ms': max(samples)}
+        return result
+
+    def reset(self):
+        for samples in self.history.values(): samples.clear()
+        self.current.clear()
+        self.frames = 0
+
+class StartupProfile:
+    # Wall-clock time of each startup phase, from process start (or when the
+    # profile was made) to the first presented frame. Work handed to a
+    # background thread is timed separately, off the critical path.
+    def __init__(self, start=None, echo=False):
+        self.start = self.last = start or time.perf_counter()
+        self.echo = echo
+        self.phases = []
+        self.background_phases = []
+        self.done = False
+
+    def mark(self, label):
+        # Closes the phase that ran since the previous mark
+        if self.done: return
+        now = time.perf_counter()
+        self.phases.append((label, (now - self.last) * 1000))
+        self.last = now
+
+    def first_frame(self):
+        if self.done: return
+        self.mark('first frame')
+        self.done = True
+        if self.echo: print(self.report())
+
+    def background(self, label):
+        # A callback for work starting now on another thread; call it when done
+        started = time.perf_counter()
+        def done():
+            ms = (time.perf_counter() - started) * 1000
+            self.background_phases.append((label, ms))
+            if self.echo: print(f"{label:<14}{ms:8.1f} ms (background)")
+        return done
+
+    def total_ms(self):
+        return (self.last - self.start) * 1000
+
+    def report(self):
+        lines = [f"{label:<14}{ms:8.1f} ms" for label, ms in self.phases]
+        lines.append(f"{'to first frame':<14}{self.total_ms():8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,173 @@
+import threading
+import pygame
+from collections import OrderedDict
+from utils import Camera
+
+class TextCache:
+    # Shared font objects plus an LRU of rendered text surfaces, so labels and
+    # slowly changing values are only rendered when their text or colour changes
+    def __init__(self, font_name="Consolas", max_entries=512):
+        self.font_name = font_name
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.scan = None
+
+    def load_in_background(self, done=None):
+        # The first SysFont lookup scans the installed fonts (fc-list on Linux),
+        # which can hold up the first frame noticeably. The scan runs on a
+        # thread; until it finishes text uses pygame's bundled font.
+        def scan():
+            pygame.sysfont.get_fonts()
+            if done: done()
+        self.scan = threading.Thread(target=scan, name="font-scan", daemon=True)
+        self.scan.start()
+
+    def font(self, size, bold=True):
+        key = (size, bold)
+        f = self.fonts.get(key)
+        if f is None:
+            if self.scan:
+                f = pygame.font.Font(None, size)
+                f.set_bold(bold)
+            else:
+                f = pygame.font.SysFont(self.font_name, size, bold=bold)
+            self.fonts[key] = f
+        return f
+
+    def render(self, text, size, color, bold=True):
+        if self.scan and not self.scan.is_alive():
+            # Scan done: drop everything made with the stand-in font
+            self.scan = None
+            self.fonts.clear()
+            self.surfaces.clear()
+        key = (text, size, tuple(color), bold)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = self.font(size, bold).render(text, True, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = self.misses = 0
+
+text_cache = TextCache()
+
+class StructureLayer:
+    # Terrain with structures baked in, split into square chunk surfaces that are
+    # built on demand around the camera and evicted least recently used first,
+    # so memory and build time don't grow with the map. paint_terrain(surface,
+    # area, camera) draws the world rect area; sync() takes (key, area, draw)
+    # items in paint order and repaints only the areas of items that appeared or
+    # went away. Item draws take (surface, camera) like the rest of the renderer.
+    def __init__(self, world_size, chunk_size, paint_terrain, max_chunks=12):
+        self.world_size = world_size
+        self.chunk_size = chunk_size
+        self.paint_terrain = paint_terrain
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.keys = {}
+        self.items = []
+
+    def _camera(self, cx, cy):
+        cam = Camera(self.chunk_size, self.chunk_size)
+        cam.camera.topleft = (-cx * self.chunk_size, -cy * self.chunk_size)
+        return cam
+
+    def _paint(self, surface, cam, area):
+        surface.set_clip(cam.apply_rect(area))
+        self.paint_terrain(surface, area, cam)
+        for _, item_area, draw in self.items:
+            if item_area.colliderect(area): draw(surface, cam)
+        surface.set_clip(None)
+
+    def chunk(self, cx, cy):
+        surf = self.chunks.get((cx, cy))
+        if surf is not None:
+            self.chunks.move_to_end((cx, cy))
+            return surf
+        surf = pygame.Surface((self.chunk_size, self.chunk_size))
+        if pygame.display.get_surface(): surf = surf.convert()
+        cam = self._camera(cx, cy)
+        self._paint(surf, cam, pygame.Rect(cx * self.chunk_size, cy * self.chunk_size, self.chunk_size, self.chunk_size))
+        self.chunks[(cx, cy)] = surf
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return surf
+
+    def sync(self, items):
+        current = {key: area for key, area, _ in items}
+        changed = [area for key, area in self.keys.items() if key not in current]
+        changed += [area for key, area in current.items() if key not in self.keys]
+        self.keys, self.items = current, items
+        for area in changed:
+            for (cx, cy), surf in self.chunks.items():
+                cam = self._camera(cx, cy)
+                if cam.apply_rect(area).colliderect(surf.get_rect()):
+                    self._paint(surf, cam, area)
+        return changed
+
+    def draw(self, surface, view):
+        c = self.chunk_size
+        for cy in range(max(0, view.top // c), min(self.world_size, view.bottom) // c + 1):
+            for cx in range(max(0, view.left // c), min(self.world_size, view.right) // c + 1):
+                if cx * c >= self.world_size or cy * c >= self.world_size: continue
+                surface.blit(self.chunk(cx, cy), (cx * c - view.x, cy * c - view.y))
+
+class DirtyRects:
+    # Screen regions touched this frame. present() pushes this frame's and last
+    # frame's regions, so sprites that moved are erased too. Anything drawn
+    # full-screen goes into the frame key, and a key change pushes everything.
+    def __init__(self, max_rects=300):
+        self.max_rects = max_rects
+        self.rects = []
+        self.prev = None
+        self.key = None
+        self.full = True
+
+    def add(self, rect):
+        if self.rects is not None:
+            self.rects.append(rect)
+            if len(self.rects) > self.max_rects: self.rects = None
+
+    def invalidate(self):
+        self.full = True
+
+    def present(self, key=None):
+        # Headless games draw to a plain surface; there is nothing to present
+        if pygame.display.get_surface():
+            if self.full or key != self.key or self.rects is None or self.prev is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.prev + self.rects)
+        self.prev, self.rects, self.key, self.full = self.rects, [], key, False
+
+class SpriteAtlas:
+    # One shared image per entity look instead of one surface per instance.
+    # paint(surface) draws the look onto a blank SRCALPHA surface; the result is
+    # converted to the display format when a display exists (not when headless).
+    def __init__(self):
+        self.images = {}
+
+    def get(self, key, size, paint):
+        img = self.images.get(key)
+        if img is None:
+            img = pygame.Surface(size, pygame.SRCALPHA)
+            paint(img)
+            if pygame.display.get_surface(): img = img.convert_alpha()
+            self.images[key] = img
+        return img
+
+    def clear(self):
+        self.images.clear()
+
+atlas = SpriteAtlas()
@@ -0,0 +1,59 @@
+import argparse
+import cProfile
+import os
+import sys
+import tempfile
+import time
+
+from settings import *
+from main import SystemGuardian
+from inputs import InputReplay
+
+# Plays back a session recorded with `python main.py --record LOG`, tick for
+# tick, so a frame-time spike seen in a real session can be reproduced and
+# profiled. Headless replays still render every frame (to an off-screen
+# surface), so drawing cost shows up in profiles too.
+#
+#   python replay.py session.sgr                      watch it in a window
+#   python replay.py session.sgr --realtime           ... at the recorded pace
+#   python replay.py session.sgr --headless --profile out.prof
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded System Guardian session")
+    parser.add_argument("log")
+    parser.add_argument("--headless", action="store_true", help="no window; runs as fast as possible")
+    parser.add_argument("--realtime", action="store_true", help="pace frames like the recording")
+    parser.add_argument("--profile", metavar="OUT", help="run under cProfile and write stats to OUT")
+    args = parser.parse_args()
+
+    replay = InputReplay(args.log, realtime=args.realtime)
+    g = SystemGuardian(headless=args.headless, seed=replay.seed, map_size=replay.map_size, input_source=replay, defer_world=True)
+
+    # Checkpoints go to a scratch file so the player's own save is left alone;
+    # snapshots the session loaded come out of the log
+    scratch = tempfile.TemporaryDirectory()
+    g.save_file = os.path.join(scratch.name, SAVE_FILE)
+    g.save_exists = bool(replay.save_exists)
+
+    profiler = cProfile.Profile() if args.profile else None
+    t = time.perf_counter()
+    try:
+        if profiler: profiler.enable()
+        g.run()
+    except SystemExit:
+        pass
+    finally:
+        if profiler: profiler.disable()
+        g.snapshots.wait()
+        scratch.cleanup()
+    elapsed = time.perf_counter() - t
+
+    ticks = g.clock.get_ticks() // g.clock.step
+    print(f"{replay.frame} frames, {ticks} ticks in {elapsed:.1f}s ({ticks * g.clock.step / 1000 / max(elapsed, 1e-9):.1f}x real time)")
+    if g.world_ready: print(f"final: {g.state}, wave {g.wave}, money {g.money}, core {g.core_hp:.0f}, player {g.player.hp:.0f}")
+    if profiler:
+        profiler.dump_stats(args.profile)
+        print(f"profile written to {args.profile}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,12 @@ import pygame
 TILE_SIZE = 48
 SCREEN_WIDTH, SCREEN_HEIGHT = 1008, 720
 FPS = 60
+RENDER_FPS = FPS
+MAX_CATCHUP_STEPS = 5
+MAP_SIZE = 64
+CHUNK_TILES = 16
+SAVE_FILE = "savegame.npz"
+MAP_CACHE_DIR = "map_cache"
 
 COLOR_BG = (10, 10, 15)
 COLOR_WALL = (45, 50, 60)
@@ -0,0 +1,87 @@
+import random
+import pygame
+from settings import FPS
+
+class RealClock:
+    def __init__(self, fps=FPS):
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+
+    def get_ticks(self):
+        return pygame.time.get_ticks()
+
+    def get_time(self):
+        return self.clock.get_time()
+
+    def get_fps(self):
+        return self.clock.get_fps()
+
+    def tick(self):
+        return self.clock.tick(self.fps)
+
+class SimClock:
+    # Simulated time; every tick() advances by a fixed step instead of waiting
+    def __init__(self, step=1000 // FPS, start=0):
+        self.step = step
+        self.ticks = start
+        self.elapsed = 0
+
+    def get_ticks(self):
+        return self.ticks
+
+    def get_time(self):
+        return self.elapsed
+
+    def get_fps(self):
+        return 1000 / self.step
+
+    def tick(self):
+        self.ticks += self.step
+        self.elapsed = self.step
+        return self.step
+
+# Active clock and RNG for all game logic. SystemGuardian installs its clock
+# here so entities can read time without a reference to the game.
+clock = RealClock()
+rng = random.Random()
+# Cosmetic randomness (particles) draws from its own stream so effects never
+# shift the gameplay sequence
+fx_rng = random.Random()
+
+def use_clock(c):
+    global clock
+    clock = c
+
+def get_ticks():
+    return clock.get_ticks()
+
+class DamageQueue:
+    # Hits from every source during a tick, keyed by target so repeated hits
+    # add up. Hit points only change when the game resolves the queue, so
+    # sources that pick targets check remaining() to skip ones already done
+    # for. Player-dealt (credited) damage is capped at what the target has
+    # left and counted for the stats.
+    def __init__(self):
+        self.hits = {}
+        self.core = 0
+        self.core_hit = False
+        self.dealt = 0
+
+    def remaining(self, target):
+        return target.hp - self.hits.get(target, 0)
+
+    def hit(self, target, amount, credit=False):
+        if credit:
+            amount = max(0, min(amount, self.remaining(target)))
+            self.dealt += amount
+        self.hits[target] = self.hits.get(target, 0) + amount
+
+    def hit_core(self, amount):
+        self.core += amount
+        self.core_hit = True
+
+    def take(self):
+        # (hits, core damage or None, credited damage) since the last take
+        result = self.hits, self.core if self.core_hit else None, self.dealt
+        self.hits, self.core, self.core_hit, self.dealt = {}, 0, False, 0
+        return result
@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import numpy as np
+
+# Snapshots are a compressed .npz: bulky grids as arrays, everything else as
+# one JSON document stored under 'meta'.
+VERSION = 2
+
+def _scalar(o):
+    # numpy scalars that end up in game state (hp, damage totals)
+    if isinstance(o, np.generic): return o.item()
+    raise TypeError(f"can't save {type(o).__name__}")
+
+def write(path, meta, arrays):
+    # Write beside the target and rename over it, so a crash mid-write leaves
+    # the previous snapshot intact
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, meta=np.frombuffer(json.dumps(meta, default=_scalar).encode(), dtype=np.uint8), **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def read(path):
+    with np.load(path) as data:
+        arrays = {k: data[k] for k in data.files}
+    meta = json.loads(arrays.pop('meta').tobytes())
+    if meta.get('version') != VERSION: raise ValueError(f"unsupported snapshot version {meta.get('version')}")
+    return meta, arrays
+
+class SnapshotWriter:
+    # Compresses and writes snapshots on a background thread so a checkpoint
+    # never stalls a frame. Only the newest pending snapshot is written. The
+    # thread isn't a daemon, so exiting the game waits for a write in progress.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = None
+        self.thread = None
+
+    def save(self, path, meta, arrays):
+        with self.lock:
+            self.pending = (path, meta, arrays)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="snapshot-writer")
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                job, self.pending = self.pending, None
+                if job is None:
+                    self.thread = None
+                    return
+            try:
+                write(*job)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Save Error: {e}")
+
+    def wait(self):
+        thread = self.thread
+        if thread: thread.join()
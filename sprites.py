@@ -1,48 +1,153 @@
 import pygame
-import random
 import math
+import numpy as np
 from settings import *
+from sim import fx_rng
 
-class Particle:
-    base_surface = pygame.Surface((PARTICLE_SIZE, PARTICLE_SIZE))
-    def __init__(self, x, y, color, speed_mult=1.0, decay_speed=None):
-        self.pos = pygame.Vector2(x, y)
-        self.vel = pygame.Vector2(random.uniform(-4, 4), random.uniform(-4, 4)) * speed_mult
-        self.life = 255
-        self.color = color
-        self.decay = decay_speed if decay_speed else random.randint(10, 20)
+class ParticleSystem:
+    # Fixed-capacity particle storage; live particles are packed at the front of
+    # the arrays. Drawing reuses one pre-tinted surface per colour and alpha step.
+    ALPHA_STEP = 16
+
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.life = np.zeros(capacity, dtype=np.float64)
+        self.decay = np.zeros(capacity, dtype=np.float64)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.surfaces = {}
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, color, count=1, speed_mult=1.0, decay_speed=None):
+        count = min(count, self.capacity - self.count)
+        for _ in range(count):
+            i = self.count
+            self.pos[i] = (x, y)
+            self.vel[i] = (fx_rng.uniform(-4, 4) * speed_mult, fx_rng.uniform(-4, 4) * speed_mult)
+            self.life[i] = 255
+            self.decay[i] = decay_speed if decay_speed else fx_rng.randint(10, 20)
+            self.color[i] = color
+            self.count += 1
+
+    def clear(self):
+        self.count = 0
 
     def update(self):
-        self.pos += self.vel
-        self.life -= self.decay
-        return self.life > 0
+        n = self.count
+        if not n: return
+        self.pos[:n] += self.vel[:n]
+        self.life[:n] -= self.decay[:n]
+        alive = self.life[:n] > 0
+        keep = int(alive.sum())
+        if keep < n:
+            for arr in (self.pos, self.vel, self.life, self.decay, self.color):
+                arr[:keep] = arr[:n][alive]
+            self.count = keep
+
+    def _surface(self, color, step):
+        key = (color, step)
+        surf = self.surfaces.get(key)
+        if surf is None:
+            surf = pygame.Surface((PARTICLE_SIZE, PARTICLE_SIZE))
+            surf.fill(color)
+            surf.set_alpha(min(255, (step + 1) * self.ALPHA_STEP))
+            self.surfaces[key] = surf
+        return surf
 
     def draw(self, surface, camera):
-        self.base_surface.set_alpha(max(0, self.life))
-        self.base_surface.fill(self.color)
-        surface.blit(self.base_surface, camera.apply_rect(pygame.Rect(self.pos.x, self.pos.y, PARTICLE_SIZE, PARTICLE_SIZE)))
-
-class Bullet:
-    def __init__(self, x, y, angle, is_enemy=False, damage=10, speed=13.5, max_dist=1000, color=COLOR_BULLET):
-        self.start_pos = pygame.Vector2(x, y)
-        self.pos = pygame.Vector2(x, y)
-        self.vel = pygame.Vector2(math.cos(angle), math.sin(angle)) * speed
-        self.active = True
-        self.is_enemy = is_enemy
-        self.damage = damage
-        self.max_dist = max_dist
-        self.rect = pygame.Rect(x-4, y-4, 8, 8)
-        self.color = color
+        n = self.count
+        if not n: return
+        ox, oy = camera.camera.topleft
+        xy = self.pos[:n].astype(np.intp) + (ox, oy)
+        on_screen = (xy[:, 0] > -PARTICLE_SIZE) & (xy[:, 0] < SCREEN_WIDTH) & (xy[:, 1] > -PARTICLE_SIZE) & (xy[:, 1] < SCREEN_HEIGHT)
+        xy = xy[on_screen]
+        steps = (self.life[:n][on_screen] // self.ALPHA_STEP).astype(np.intp)
+        colors = [tuple(c) for c in self.color[:n][on_screen].tolist()]
+        surface.blits([(self._surface(c, st), p) for c, st, p in zip(colors, steps.tolist(), xy.tolist())], doreturn=False)
+        if len(xy):
+            (x0, y0), (x1, y1) = xy.min(0).tolist(), xy.max(0).tolist()
+            return pygame.Rect(x0, y0, x1 - x0 + PARTICLE_SIZE, y1 - y0 + PARTICLE_SIZE)
+
+class BulletPool:
+    # Structure-of-arrays storage for every live bullet. Dead slots have zero
+    # velocity and go back on the free list for reuse.
+    FIELDS = {
+        'pos': ((2,), np.float64), 'vel': ((2,), np.float64), 'origin': ((2,), np.float64),
+        'damage': ((), np.float64), 'max_dist': ((), np.float64), 'color': ((3,), np.uint8),
+        'is_enemy': ((), np.bool_), 'active': ((), np.bool_),
+    }
 
-    def update(self, walls):
+    def __init__(self, capacity=256, bound=4000):
+        self.capacity = 0
+        self.bound = bound
+        self.free = []
+        for name, (shape, dtype) in self.FIELDS.items():
+            setattr(self, name, np.zeros((0,) + shape, dtype=dtype))
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def _grow(self, capacity):
+        old = self.capacity
+        for name, (shape, dtype) in self.FIELDS.items():
+            arr = np.zeros((capacity,) + shape, dtype=dtype)
+            arr[:old] = getattr(self, name)
+            setattr(self, name, arr)
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def spawn(self, x, y, angle, is_enemy=False, damage=10, speed=13.5, max_dist=1000, color=COLOR_BULLET):
+        if not self.free: self._grow(self.capacity * 2)
+        i = self.free.pop()
+        self.pos[i] = self.origin[i] = (x, y)
+        self.vel[i] = (math.cos(angle) * speed, math.sin(angle) * speed)
+        self.damage[i] = damage
+        self.max_dist[i] = max_dist
+        self.color[i] = color
+        self.is_enemy[i] = is_enemy
+        self.active[i] = True
+        return i
+
+    def kill(self, i):
+        self.active[i] = False
+        self.vel[i] = 0
+        self.free.append(i)
+
+    def live(self):
+        return np.flatnonzero(self.active).tolist()
+
+    def rect(self, i):
+        r = pygame.Rect(0, 0, 8, 8)
+        r.center = (int(self.pos[i, 0]), int(self.pos[i, 1]))
+        return r
+
+    def step(self, wall_mask):
         self.pos += self.vel
-        self.rect.center = (int(self.pos.x), int(self.pos.y))
-        if self.pos.distance_to(self.start_pos) > self.max_dist:
-            self.active = False
-            return
-        gx, gy = int(self.pos.x // TILE_SIZE), int(self.pos.y // TILE_SIZE)
-        if (gx, gy) in walls: self.active = False
-        if not (0 <= self.pos.x < 4000 and 0 <= self.pos.y < 4000): self.active = False
+        idx = np.flatnonzero(self.active)
+        if not len(idx): return
+        p = self.pos[idx]
+        travelled = p - self.origin[idx]
+        dead = (travelled * travelled).sum(axis=1) > self.max_dist[idx] ** 2
+        inside = ((p >= 0) & (p < self.bound)).all(axis=1)
+        g = (p // TILE_SIZE).astype(np.intp)
+        on_map = inside & (g[:, 0] < wall_mask.shape[0]) & (g[:, 1] < wall_mask.shape[1])
+        hit = np.zeros(len(idx), dtype=np.bool_)
+        hit[on_map] = wall_mask[g[on_map, 0], g[on_map, 1]]
+        for i in idx[dead | ~inside | hit].tolist():
+            self.kill(i)
+
+    def draw(self, surface, camera, alpha=0):
+        idx = np.flatnonzero(self.active)
+        ox, oy = camera.camera.topleft
+        centers = (self.pos[idx] + self.vel[idx] * alpha).astype(np.intp) + (ox, oy)
+        on_screen = (centers[:, 0] > -3) & (centers[:, 0] < SCREEN_WIDTH + 3) & (centers[:, 1] > -3) & (centers[:, 1] < SCREEN_HEIGHT + 3)
+        idx, centers = idx[on_screen], centers[on_screen]
+        return [pygame.draw.circle(surface, color, (x, y), 3) for (x, y), color in zip(centers.tolist(), self.color[idx].tolist())]
 
 class Grenade:
     def __init__(self, start_x, start_y, target_x, target_y):
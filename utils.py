@@ -12,9 +12,16 @@ class Camera:
     def apply_rect(self, rect):
         return rect.move(self.camera.topleft)
 
+    def view_rect(self, margin=0):
+        # World-space rect currently on screen
+        return pygame.Rect(-self.camera.x, -self.camera.y, SCREEN_WIDTH, SCREEN_HEIGHT).inflate(margin * 2, margin * 2)
+
     def update(self, target):
-        x = -target.rect.centerx + int(SCREEN_WIDTH / 2)
-        y = -target.rect.centery + int(SCREEN_HEIGHT / 2)
+        self.follow(target.rect)
+
+    def follow(self, rect):
+        x = -rect.centerx + int(SCREEN_WIDTH / 2)
+        y = -rect.centery + int(SCREEN_HEIGHT / 2)
         x = min(0, max(-(self.width - SCREEN_WIDTH), x))
         y = min(0, max(-(self.height - SCREEN_HEIGHT), y))
         self.camera = pygame.Rect(x, y, self.width, self.height)
\ No newline at end of file
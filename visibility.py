@@ -0,0 +1,106 @@
+import math
+import numpy as np
+from settings import TILE_SIZE
+
+# Entity rects are TILE_SIZE-4 wide at their tile's top-left, so a sprite at
+# rest is centred this far into its tile
+CENTRE = (TILE_SIZE - 4) // 2
+
+def trace_line_of_sight(is_blocked, start, end):
+    # The per-shooter check between two pixel points: samples every half tile,
+    # endpoints excluded. VisibilityField agrees with it for sprites at rest.
+    dist = math.hypot(end[0] - start[0], end[1] - start[1])
+    if dist == 0: return True
+    steps = int(dist / (TILE_SIZE / 2))
+    for i in range(1, steps):
+        t = i / steps
+        x = start[0] + (end[0] - start[0]) * t
+        y = start[1] + (end[1] - start[1]) * t
+        if is_blocked(int(x // TILE_SIZE), int(y // TILE_SIZE)): return False
+    return True
+
+class VisibilityField:
+    # Which tiles around the player have a clear line of sight to it. Rays are
+    # sampled every half tile from the shooter's sprite centre to the player's,
+    # as trace_line_of_sight does, but for every tile in range at once and only
+    # when the player changes tile or a blocking structure is added or removed.
+    rays = {}
+
+    def __init__(self, grid, radius=8):
+        self.grid = grid
+        self.radius = radius
+        self.key = None
+        self.origin = (0, 0)
+        self.visible = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=bool)
+        # Rays only depend on the radius, so every field with the same radius shares them
+        if radius not in self.rays: self.rays[radius] = self._build_rays(radius)
+        self.ray_x, self.ray_y, self.ray_used = self.rays[radius]
+
+    @staticmethod
+    def _build_rays(r):
+        rays = []
+        for dx in range(-r, r + 1):
+            for dy in range(-r, r + 1):
+                # Same arithmetic as trace_line_of_sight, from the shooter at
+                # (dx, dy) to the player at (0, 0), so samples round the same way
+                sx, sy = dx * TILE_SIZE + CENTRE, dy * TILE_SIZE + CENTRE
+                steps = int(math.hypot(CENTRE - sx, CENTRE - sy) / (TILE_SIZE / 2))
+                samples = set()
+                for i in range(1, steps):
+                    t = i / steps
+                    samples.add((int((sx + (CENTRE - sx) * t) // TILE_SIZE), int((sy + (CENTRE - sy) * t) // TILE_SIZE)))
+                rays.append(sorted(samples))
+        width = max(1, max(len(ray) for ray in rays))
+        ray_x = np.zeros((len(rays), width), dtype=np.intp)
+        ray_y = np.zeros((len(rays), width), dtype=np.intp)
+        ray_used = np.zeros((len(rays), width), dtype=bool)
+        for i, ray in enumerate(rays):
+            for j, (sx, sy) in enumerate(ray):
+                ray_x[i, j], ray_y[i, j], ray_used[i, j] = sx, sy, True
+        return ray_x, ray_y, ray_used
+
+    def update(self, px, py):
+        key = (px, py, self.grid.version)
+        if key == self.key: return
+        self.key = key
+        self.origin = (px, py)
+        r = self.radius
+        # Padding keeps every sample index in bounds; off-map tiles never block
+        blocked = np.pad(self.grid.blocked, r)
+        hits = blocked[self.ray_x + px + r, self.ray_y + py + r] & self.ray_used
+        self.visible[...] = ~hits.any(axis=1).reshape(self.visible.shape)
+
+    def is_visible(self, gx, gy):
+        dx, dy = gx - self.origin[0], gy - self.origin[1]
+        if abs(dx) > self.radius or abs(dy) > self.radius: return False
+        return bool(self.visible[dx + self.radius, dy + self.radius])
+
+def check(seeds=range(5), size=64, players=200, radius=8):
+    # Compares the field with trace_line_of_sight on random maps for every
+    # shooter tile ShooterEnemy would test (Manhattan distance under radius)
+    import random
+    from grid import OccupancyGrid
+    from mapgen import generate
+    pairs = mismatches = 0
+    for seed in seeds:
+        rnd = random.Random(seed)
+        grid = OccupancyGrid(size, generate(seed, size, (size // 2, size // 2)))
+        field = VisibilityField(grid, radius)
+        for _ in range(players):
+            px, py = rnd.randrange(size), rnd.randrange(size)
+            field.update(px, py)
+            end = (px * TILE_SIZE + CENTRE, py * TILE_SIZE + CENTRE)
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    gx, gy = px + dx, py + dy
+                    if abs(dx) + abs(dy) >= radius or not (0 <= gx < size and 0 <= gy < size): continue
+                    start = (gx * TILE_SIZE + CENTRE, gy * TILE_SIZE + CENTRE)
+                    pairs += 1
+                    mismatches += field.is_visible(gx, gy) != trace_line_of_sight(grid.is_blocked, start, end)
+    return pairs, mismatches
+
+if __name__ == "__main__":
+    # python visibility.py: exits non-zero if the field and the ray check disagree
+    pairs, mismatches = check()
+    print(f"{mismatches} of {pairs} shooter/player pairs disagree with trace_line_of_sight")
+    raise SystemExit(1 if mismatches else 0)